@@ -6,13 +6,12 @@ FastAPI와 Gradio를 함께 실행
 import gradio as gr
 from PIL import Image
 import numpy as np
-import io
-from server_birefnet import process_image, simple_background_removal, load_model
-import torch
+# API 서버와 같은 엔진 인스턴스를 사용 (모델 한 번만 로드)
+from server_birefnet import engine
 
 # 모델 로드
 print("Loading BiRefNet model...")
-model_loaded = load_model()
+model_loaded = engine.load()
 
 def remove_background_gradio(input_image):
     """Gradio 인터페이스용 배경 제거 함수"""
@@ -25,17 +24,10 @@ def remove_background_gradio(input_image):
     else:
         image = input_image
     
-    # RGB로 변환
-    if image.mode != 'RGB':
-        image = image.convert('RGB')
-    
-    # 배경 제거
+    # 배경 제거 (API와 같은 전처리: EXIF 회전, 크기 제한, RGB 변환)
     try:
-        if model_loaded:
-            result = process_image(image)
-        else:
-            result = simple_background_removal(image)
-        return result
+        image = engine.prepare(image)
+        return engine.remove_background(image)
     except Exception as e:
         print(f"Error: {e}")
         return image.convert("RGBA")
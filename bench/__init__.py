@@ -0,0 +1,7 @@
+"""
+CleanCut 배경 제거 파이프라인 벤치마크
+
+실행:
+python -m bench run --sizes 512x512,1024x768,2048x1536 --concurrency 1,4
+python -m bench compare bench_results/old.json bench_results/new.json
+"""
@@ -0,0 +1,200 @@
+"""
+벤치마크 CLI
+
+python -m bench run [--sizes 512x512,1024x768] [--concurrency 1,4] [--cases 'encode_*']
+                    [--folder images/] [--load-model | --stub] [--memory] [--output results.json]
+python -m bench compare old.json new.json [--threshold 0.1] [--metric peak_rss_delta_mb]
+"""
+
+import argparse
+import fnmatch
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from bench.images import encode_jpeg, load_folder, parse_size, synthetic_image
+from bench.memory import configure_malloc, peak_rss_delta
+from bench.runner import run_case
+
+DEFAULT_SIZES = "512x512,1024x1024,2048x1536"
+DEFAULT_OUTPUT_DIR = "bench_results"
+
+
+def _git_revision() -> Tuple[str, bool]:
+    """(짧은 커밋 해시, 작업 트리 변경 여부)"""
+    try:
+        rev = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+        dirty = bool(subprocess.check_output(["git", "status", "--porcelain", "--untracked-files=no"], text=True).strip())
+        return rev, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+def _environment() -> dict:
+    import numpy
+    import PIL
+    import torch
+    rev, dirty = _git_revision()
+    return {
+        "git_revision": rev,
+        "git_dirty": dirty,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": numpy.__version__,
+        "pillow": PIL.__version__,
+        "torch": torch.__version__,
+        "cuda": torch.cuda.is_available(),
+    }
+
+
+def _inputs(args) -> List[Tuple[str, List[bytes]]]:
+    """(입력 라벨, 페이로드 목록)"""
+    if args.folder:
+        files = load_folder(args.folder)
+        if not files:
+            raise SystemExit(f"No images found in {args.folder}")
+        return [(f"folder:{os.path.basename(os.path.normpath(args.folder))}", [data for _, data in files])]
+    inputs = []
+    for text in args.sizes.split(","):
+        width, height = parse_size(text)
+        payloads = [encode_jpeg(synthetic_image(width, height, seed)) for seed in range(args.variants)]
+        inputs.append((f"{width}x{height}", payloads))
+    return inputs
+
+
+def run(args) -> int:
+    import server_birefnet
+    from bench.cases import CASES
+
+    # 요청마다 찍히는 서버 로그가 결과 출력을 덮지 않도록
+    logging.getLogger().setLevel(logging.WARNING)
+
+    if args.stub:
+        server_birefnet.engine.config.model_name = "stub"
+    if args.load_model or args.stub:
+        server_birefnet.engine.load()
+
+    selected = [
+        name for name in CASES
+        if any(fnmatch.fnmatch(name, pattern) for pattern in args.cases.split(","))
+    ]
+    concurrency_levels = [int(c) for c in args.concurrency.split(",")]
+    # 할당 정책은 어떤 케이스보다 먼저 한 번만 바꾼다 (한 결과 파일 안의 시간은 같은 정책에서 측정)
+    malloc = configure_malloc() if args.memory else None
+
+    results = []
+    for input_label, payloads in _inputs(args):
+        for name in selected:
+            fn = CASES[name](payloads)
+            if isinstance(fn, str):
+                print(f"SKIP {name:45s} {input_label:12s} {fn}")
+                continue
+            peak_mb = None
+            for concurrency in concurrency_levels:
+                stats = run_case(fn, repeat=args.repeat, warmup=args.warmup, concurrency=concurrency)
+                if args.memory:
+                    # 워밍업이 끝난 정상 상태에서, 다른 스레드의 할당이 섞이지 않도록 단독 실행으로 측정
+                    if peak_mb is None:
+                        peak_mb = peak_rss_delta(fn)
+                    stats["peak_rss_delta_mb"] = peak_mb
+                results.append({"case": name, "input": input_label, "concurrency": concurrency, **stats})
+                memory = f" peak+{peak_mb}MB" if peak_mb is not None else ""
+                print(
+                    f"{name:45s} {input_label:12s} c={concurrency:<3d} "
+                    f"p50={stats['p50_ms']:9.2f}ms p95={stats['p95_ms']:9.2f}ms "
+                    f"{stats['throughput_per_s']:8.2f}/s{memory}"
+                )
+
+    report = {
+        "environment": {**_environment(), "malloc": malloc},
+        "model_loaded": server_birefnet.engine.loaded,
+        "engine_config": vars(server_birefnet.engine.config),
+        "args": vars(args),
+        "results": results,
+    }
+    output = args.output
+    if output is None:
+        os.makedirs(DEFAULT_OUTPUT_DIR, exist_ok=True)
+        rev = report["environment"]["git_revision"]
+        suffix = "-dirty" if report["environment"]["git_dirty"] else ""
+        output = os.path.join(DEFAULT_OUTPUT_DIR, f"{rev}{suffix}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"Results written to {output}")
+    return 0
+
+
+def compare(args) -> int:
+    """두 결과 파일의 지표(기본 p50) 비교, 회귀가 있으면 종료 코드 1"""
+    def load(path) -> dict:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def results(report) -> Dict[Tuple[str, str, int], dict]:
+        return {(r["case"], r["input"], r["concurrency"]): r for r in report["results"]}
+
+    old_report, new_report = load(args.old), load(args.new)
+    if old_report["environment"].get("malloc") != new_report["environment"].get("malloc"):
+        print("WARNING: malloc settings differ (one run used --memory), timings are not directly comparable")
+    old, new = results(old_report), results(new_report)
+    regressions = 0
+    for key in sorted(set(old) & set(new)):
+        before, after = old[key].get(args.metric), new[key].get(args.metric)
+        if before is None or after is None:
+            continue
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > args.threshold:
+            flag = "REGRESSION"
+            regressions += 1
+        elif change < -args.threshold:
+            flag = "improved"
+        case, input_label, concurrency = key
+        print(
+            f"{case:45s} {input_label:12s} c={concurrency:<3d} "
+            f"{before:9.2f} -> {after:9.2f} ({change:+7.1%}) {flag}"
+        )
+    for key in sorted(set(old) ^ set(new)):
+        print(f"{key[0]:45s} {key[1]:12s} c={key[2]:<3d} only in {'old' if key in old else 'new'}")
+    return 1 if regressions else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench", description="CleanCut pipeline benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="run benchmarks and write JSON results")
+    run_parser.add_argument("--sizes", default=DEFAULT_SIZES, help="synthetic image sizes, e.g. 512x512,1024x768")
+    run_parser.add_argument("--variants", type=int, default=2, help="synthetic images per size")
+    run_parser.add_argument("--folder", help="use images from this folder instead of synthetic ones")
+    run_parser.add_argument("--cases", default="*", help="comma separated glob patterns of case names")
+    run_parser.add_argument("--concurrency", default="1", help="comma separated thread counts")
+    run_parser.add_argument("--repeat", type=int, default=5, help="measured runs per case")
+    run_parser.add_argument("--warmup", type=int, default=1, help="discarded runs per case")
+    run_parser.add_argument("--load-model", action="store_true", help="load the model (CLEANCUT_MODEL) first")
+    run_parser.add_argument("--stub", action="store_true", help="load the stub model (no weights needed)")
+    run_parser.add_argument("--memory", action="store_true",
+                            help="also record the peak RSS growth of one run (Linux only)")
+    run_parser.add_argument("--output", help=f"result file (default: {DEFAULT_OUTPUT_DIR}/<revision>-<time>.json)")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = sub.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--metric", default="p50_ms", help="metric to compare (default: p50_ms)")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="relative change flagged as regression")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""
+벤치마크 케이스 정의
+
+각 케이스는 입력 페이로드 목록을 받아 "한 번의 작업" 함수를 돌려주는
+팩토리다. 함수가 None 대신 문자열을 돌려주면 해당 환경에서 건너뛴 이유이다.
+"""
+
+import io
+import itertools
+from typing import Callable, Dict, List, Union
+
+import numpy as np
+import torch
+from PIL import Image
+
+import server_birefnet
+from cleancut.engine import upsample_alpha
+from server_birefnet import engine
+
+CaseFn = Callable[[], None]
+Factory = Callable[[List[bytes]], Union[CaseFn, str]]
+
+# /remove-background-batch 한 번에 보내는 파일 수
+HTTP_BATCH_SIZE = 4
+
+
+def _cycle(items: list) -> Callable[[], object]:
+    """호출할 때마다 다음 항목을 돌려주는 함수 (여러 스레드에서 호출 가능)"""
+    counter = itertools.count()
+    return lambda: items[next(counter) % len(items)]
+
+
+def _prepared(payloads: List[bytes]) -> List[Image.Image]:
+    return [engine.load_image(p) for p in payloads]
+
+
+def _rgba_results(payloads: List[bytes]) -> List[Image.Image]:
+    """인코딩 케이스용 RGBA 결과 (모델이 없으면 폴백 결과)"""
+    return [engine.remove_background(image) for image in _prepared(payloads)]
+
+
+def prepare_image(payloads: List[bytes]) -> CaseFn:
+    next_payload = _cycle(payloads)
+    return lambda: engine.load_image(next_payload())
+
+
+def process_image(payloads: List[bytes]) -> Union[CaseFn, str]:
+    if not engine.loaded:
+        return "model not loaded (use --load-model or --stub)"
+    next_image = _cycle(_prepared(payloads))
+    return lambda: engine.release(engine.process(next_image()))
+
+
+def pipeline(payloads: List[bytes]) -> CaseFn:
+    """디코드 -> 배경 제거 -> PNG 인코딩 (HTTP 제외 엔드투엔드)"""
+    next_payload = _cycle(payloads)
+
+    def run():
+        image = engine.load_image(next_payload())
+        engine.remove_background_png(image)
+    return run
+
+
+def simple_server(payloads: List[bytes]) -> CaseFn:
+    next_image = _cycle(_prepared(payloads))
+    return lambda: engine.release(engine.fallback(next_image()))
+
+
+def simple_app_fastapi(payloads: List[bytes]) -> Union[CaseFn, str]:
+    try:
+        import app_fastapi
+    except ImportError as e:
+        return f"app_fastapi not importable: {e}"
+    next_image = _cycle(_prepared(payloads))
+    return lambda: app_fastapi.engine.release(app_fastapi.engine.fallback(next_image()))
+
+
+def _mask_inputs(payloads: List[bytes]) -> List[tuple]:
+    """(원본 크기 RGB 이미지, 모델 입력 해상도 확률 텐서) 쌍"""
+    size = engine.config.input_size
+    inputs = []
+    for seed, image in enumerate(_prepared(payloads)):
+        # 부드러운 경계를 가진 결정적 확률 마스크
+        generator = torch.Generator().manual_seed(seed)
+        logits = torch.randn(1, 1, size // 32, size // 32, generator=generator) * 8
+        logits = torch.nn.functional.interpolate(logits, size=(size, size), mode="bilinear", align_corners=False)
+        inputs.append((image, torch.sigmoid(logits)))
+    return inputs
+
+
+def mask_postprocess_pil(payloads: List[bytes]) -> CaseFn:
+    """이전 후처리: numpy uint8 -> PIL LANCZOS 리사이즈 -> convert(RGBA) + putalpha"""
+    next_input = _cycle(_mask_inputs(payloads))
+
+    def run():
+        image, probs = next_input()
+        mask = probs.squeeze().cpu().numpy()
+        alpha = Image.fromarray((mask * 255).astype(np.uint8))
+        alpha = alpha.resize(image.size, Image.Resampling.LANCZOS)
+        image_rgba = image.convert("RGBA")
+        image_rgba.putalpha(alpha)
+    return run
+
+
+def _mask_postprocess_tensor(mode: str) -> Factory:
+    def factory(payloads: List[bytes]) -> CaseFn:
+        next_input = _cycle(_mask_inputs(payloads))
+
+        def run():
+            image, probs = next_input()
+            alpha = upsample_alpha(probs, image.size, mode)[0]
+            image_rgba = image.convert("RGBA")
+            image_rgba.putalpha(Image.frombuffer("L", image.size, alpha, "raw", "L", 0, 1))
+        return run
+    return factory
+
+
+def mask_postprocess_engine(payloads: List[bytes]) -> CaseFn:
+    """현재 Engine.postprocess: 텐서 보간 + 풀 버퍼에 인터리브 합성"""
+    next_input = _cycle(_mask_inputs(payloads))
+
+    def run():
+        image, probs = next_input()
+        engine.release(engine.postprocess(image, probs))
+    return run
+
+
+def _encoder(**save_kwargs) -> Factory:
+    def factory(payloads: List[bytes]) -> CaseFn:
+        next_result = _cycle(_rgba_results(payloads))
+
+        def run():
+            output = io.BytesIO()
+            next_result().save(output, **save_kwargs)
+        return run
+    return factory
+
+
+def _http(path: str, batch: int) -> Factory:
+    def factory(payloads: List[bytes]) -> Union[CaseFn, str]:
+        try:
+            from fastapi.testclient import TestClient
+        except ImportError as e:
+            return f"TestClient unavailable: {e}"
+        # startup 이벤트(모델 로드)를 피하려고 컨텍스트 매니저 없이 사용
+        client = TestClient(server_birefnet.app)
+        # --load-model/--stub 없이 실행하면 tier 모델을 로드하지 않고 폴백으로 처리
+        server_birefnet.tiered_engines.autoload = engine.loaded
+        next_payload = _cycle(payloads)
+        field = "files" if batch > 1 else "file"
+
+        def run():
+            files = [
+                (field, (f"bench{i}.jpg", next_payload(), "image/jpeg"))
+                for i in range(batch)
+            ]
+            response = client.post(path, files=files)
+            response.raise_for_status()
+        return run
+    return factory
+
+
+CASES: Dict[str, Factory] = {
+    "prepare_image": prepare_image,
+    "process_image": process_image,
+    "pipeline": pipeline,
+    "simple_background_removal[server_birefnet]": simple_server,
+    "simple_background_removal[app_fastapi]": simple_app_fastapi,
+    "mask_postprocess[pil_lanczos]": mask_postprocess_pil,
+    "mask_postprocess[tensor_bilinear]": _mask_postprocess_tensor("bilinear"),
+    "mask_postprocess[tensor_bicubic]": _mask_postprocess_tensor("bicubic"),
+    "mask_postprocess[engine]": mask_postprocess_engine,
+    "encode_png": _encoder(format="PNG", optimize=True),
+    "encode_webp_lossless": _encoder(format="WEBP", lossless=True),
+    "encode_webp": _encoder(format="WEBP", quality=90),
+    "http:/remove-background": _http("/remove-background", 1),
+    "http:/remove-background-batch": _http("/remove-background-batch", HTTP_BATCH_SIZE),
+}
@@ -0,0 +1,65 @@
+"""
+벤치마크 입력 이미지
+
+네트워크나 샘플 파일 없이도 재현 가능한 결과를 얻기 위해 시드 고정
+합성 이미지를 만들거나, 로컬 폴더의 이미지를 읽는다.
+"""
+
+import io
+import os
+from typing import List, Tuple
+
+import numpy as np
+from PIL import Image
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp")
+
+
+def parse_size(text: str) -> Tuple[int, int]:
+    """'1024x768' -> (1024, 768)"""
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def synthetic_image(width: int, height: int, seed: int = 0) -> Image.Image:
+    """
+    제품 사진과 비슷한 합성 RGB 이미지
+
+    밝은 그라데이션 배경 위에 노이즈가 섞인 타원형 피사체를 그린다.
+    같은 (width, height, seed) 는 항상 같은 이미지를 만든다.
+    """
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+
+    # 배경: 세로 그라데이션
+    background = 235 - 25 * (yy / max(height - 1, 1))
+    image = np.repeat(background[..., None], 3, axis=2)
+
+    # 피사체: 화면 중앙 근처의 타원
+    cx = width * rng.uniform(0.4, 0.6)
+    cy = height * rng.uniform(0.4, 0.6)
+    rx = width * rng.uniform(0.2, 0.3)
+    ry = height * rng.uniform(0.25, 0.35)
+    inside = ((xx - cx) / rx) ** 2 + ((yy - cy) / ry) ** 2 <= 1.0
+    color = rng.uniform(30, 200, size=3).astype(np.float32)
+    texture = rng.normal(0, 12, size=(height, width, 1)).astype(np.float32)
+    image = np.where(inside[..., None], color + texture, image)
+
+    return Image.fromarray(np.clip(image, 0, 255).astype(np.uint8), "RGB")
+
+
+def encode_jpeg(image: Image.Image, quality: int = 90) -> bytes:
+    """업로드 페이로드와 같은 JPEG 바이트"""
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=quality)
+    return output.getvalue()
+
+
+def load_folder(path: str) -> List[Tuple[str, bytes]]:
+    """폴더 안 이미지 파일을 (이름, 바이트) 목록으로 읽기"""
+    files = []
+    for name in sorted(os.listdir(path)):
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            with open(os.path.join(path, name), "rb") as f:
+                files.append((name, f.read()))
+    return files
@@ -0,0 +1,251 @@
+"""
+로컬 서버 부하 생성기 (closed-loop)
+
+server_birefnet 을 별도 프로세스로 띄우고(또는 --url 로 기존 서버 지정)
+지정한 동시성만큼의 워커가 응답을 받자마자 다음 요청을 보낸다.
+--rate 를 주면 전체 요청 속도를 그 이하로 제한한다.
+지연 시간 p50/p95/p99, 처리량, 오류율과 /metrics 에서 읽은 서버 RSS 추이를 보고한다.
+
+실행:
+python -m bench.loadgen --stub --concurrency 4 --duration 30
+python -m bench.loadgen --stub --server-env CLEANCUT_STUB_LATENCY_MS=200 --rate 2
+python -m bench.loadgen --url http://localhost:8000 --concurrency 8
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from typing import List, Optional
+
+import httpx
+import numpy as np
+
+from bench.images import encode_jpeg, parse_size, synthetic_image
+
+RSS_METRIC = "cleancut_process_resident_memory_bytes"
+
+
+def start_server(port: int, stub: bool, env_overrides: List[str]) -> subprocess.Popen:
+    """uvicorn 으로 server_birefnet 을 띄운다"""
+    env = dict(os.environ)
+    if stub:
+        # 모델 가중치 없이 대체 모델로 실행 (cleancut.stub_model)
+        env["CLEANCUT_MODEL"] = "stub"
+    for item in env_overrides:
+        key, _, value = item.partition("=")
+        env[key] = value
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server_birefnet:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+
+
+def wait_ready(url: str, timeout: float) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{url}/health", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise SystemExit(f"Server at {url} did not become ready within {timeout}s")
+
+
+def scrape_rss(client: httpx.Client, url: str) -> Optional[float]:
+    """서버 /metrics 에서 RSS (바이트) 읽기"""
+    try:
+        text = client.get(f"{url}/metrics", timeout=5).text
+    except httpx.HTTPError:
+        return None
+    for line in text.splitlines():
+        if line.startswith(RSS_METRIC + " "):
+            return float(line.split()[1])
+    return None
+
+
+class RatePacer:
+    """전체 워커가 공유하는 요청 간격 제한 (rate 가 없으면 제한 없음)"""
+
+    def __init__(self, rate: Optional[float]):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            slot = max(self._next, time.perf_counter())
+            self._next = slot + self.interval
+        delay = slot - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class LoadResult:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.statuses: Counter = Counter()
+        self.errors: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, status: Optional[int], error: Optional[str] = None):
+        with self._lock:
+            self.latencies.append(latency)
+            self.statuses[str(status) if status is not None else "error"] += 1
+            if error is not None:
+                self.errors[error] += 1
+
+
+def worker(url: str, endpoint: str, payloads: List[bytes], batch_size: int,
+           pacer: RatePacer, stop_at: float, record_after: float, result: LoadResult, timeout: float):
+    field = "files" if endpoint.endswith("-batch") else "file"
+    count = batch_size if field == "files" else 1
+    index = 0
+    with httpx.Client(timeout=timeout) as client:
+        while True:
+            pacer.wait()
+            start = time.perf_counter()
+            if start >= stop_at:
+                return
+            files = []
+            for i in range(count):
+                files.append((field, (f"load{i}.jpg", payloads[index % len(payloads)], "image/jpeg")))
+                index += 1
+            status, error = None, None
+            try:
+                response = client.post(f"{url}{endpoint}", files=files)
+                status = response.status_code
+                if status >= 400:
+                    error = f"HTTP {status}"
+            except httpx.HTTPError as e:
+                error = type(e).__name__
+            latency = time.perf_counter() - start
+            # 워밍업 구간 결과는 버린다
+            if start >= record_after:
+                result.record(latency, status, error)
+
+
+def run(args) -> dict:
+    server = None
+    url = args.url
+    if url is None:
+        url = f"http://127.0.0.1:{args.port}"
+        server = start_server(args.port, args.stub, args.server_env)
+    try:
+        wait_ready(url, args.startup_timeout)
+
+        width, height = parse_size(args.size)
+        payloads = [encode_jpeg(synthetic_image(width, height, seed)) for seed in range(args.variants)]
+
+        result = LoadResult()
+        pacer = RatePacer(args.rate)
+        start = time.perf_counter()
+        record_after = start + args.warmup
+        stop_at = record_after + args.duration
+        threads = [
+            threading.Thread(
+                target=worker,
+                args=(url, args.endpoint, payloads, args.batch_size, pacer, stop_at, record_after, result, args.timeout),
+                daemon=True,
+            )
+            for _ in range(args.concurrency)
+        ]
+        for t in threads:
+            t.start()
+
+        # 요청과 별개로 1초마다 서버 RSS 기록
+        rss_series = []
+        with httpx.Client() as metrics_client:
+            while any(t.is_alive() for t in threads):
+                rss = scrape_rss(metrics_client, url)
+                if rss is not None:
+                    rss_series.append({"t": round(time.perf_counter() - start, 2), "rss_mb": round(rss / 2**20, 1)})
+                time.sleep(args.rss_interval)
+        for t in threads:
+            t.join()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    latencies = np.asarray(result.latencies) * 1000
+    total = len(result.latencies)
+    failed = sum(result.errors.values())
+    images_per_request = args.batch_size if args.endpoint.endswith("-batch") else 1
+    report = {
+        "args": vars(args),
+        "requests": total,
+        "errors": failed,
+        "error_rate": round(failed / total, 4) if total else None,
+        "statuses": dict(result.statuses),
+        "error_kinds": dict(result.errors),
+        "throughput_rps": round(total / args.duration, 3),
+        "throughput_images_per_s": round(total * images_per_request / args.duration, 3),
+        "rss_mb": rss_series,
+    }
+    if total:
+        report.update({
+            "mean_ms": round(float(latencies.mean()), 2),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+            "p99_ms": round(float(np.percentile(latencies, 99)), 2),
+            "max_ms": round(float(latencies.max()), 2),
+        })
+    return report
+
+
+def print_report(report: dict):
+    print(f"requests: {report['requests']}  errors: {report['errors']} ({report['error_rate']})")
+    print(f"throughput: {report['throughput_rps']} req/s, {report['throughput_images_per_s']} images/s")
+    if report["requests"]:
+        print(
+            f"latency: p50={report['p50_ms']}ms p95={report['p95_ms']}ms "
+            f"p99={report['p99_ms']}ms max={report['max_ms']}ms"
+        )
+    if report["rss_mb"]:
+        values = [point["rss_mb"] for point in report["rss_mb"]]
+        print(f"server RSS: start={values[0]}MB peak={max(values)}MB end={values[-1]}MB")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench.loadgen", description="Closed-loop load generator")
+    parser.add_argument("--url", help="target an already running server instead of starting one")
+    parser.add_argument("--port", type=int, default=8765, help="port for the locally started server")
+    parser.add_argument("--stub", action="store_true",
+                        help="start the server with the stub model (CLEANCUT_MODEL=stub, no weights)")
+    parser.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the started server (repeatable)")
+    parser.add_argument("--endpoint", default="/remove-background",
+                        choices=["/remove-background", "/remove-background-batch"])
+    parser.add_argument("--batch-size", type=int, default=4, help="files per batch request")
+    parser.add_argument("--concurrency", type=int, default=4, help="number of closed-loop workers")
+    parser.add_argument("--rate", type=float, help="cap on total requests per second")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="seconds of unrecorded warmup")
+    parser.add_argument("--size", default="1024x768", help="synthetic image size")
+    parser.add_argument("--variants", type=int, default=4, help="distinct synthetic images")
+    parser.add_argument("--timeout", type=float, default=300, help="per-request timeout (s)")
+    parser.add_argument("--startup-timeout", type=float, default=300, help="seconds to wait for /health")
+    parser.add_argument("--rss-interval", type=float, default=1.0, help="seconds between RSS samples")
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
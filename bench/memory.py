@@ -0,0 +1,86 @@
+"""
+최대 메모리 측정
+
+Linux 의 /proc/self/clear_refs 에 5 를 쓰면 프로세스 최대 RSS (VmHWM) 가
+현재 RSS 로 초기화된다. 케이스 함수 한 번 실행 전후로 초기화/읽기를 해서
+그 실행이 늘린 최대 RSS 를 잰다. 큰 배열은 mmap 으로 할당되고 해제 즉시
+반환되어야 하므로, glibc 의 동적 mmap 임계값 조정을 mallopt 로 끈다
+(끄지 않으면 한 번 해제된 큰 블록 크기 이하는 힙에 남아 두 번째 실행부터 0 으로 보인다).
+이 설정은 프로세스 전체의 할당 정책을 바꿔 시간 측정에도 영향을 주므로, --memory 면
+측정을 시작하기 전에 configure_malloc() 을 한 번 호출하고 결과 파일에 기록한다.
+
+동시에 다른 스레드가 할당하면 값이 섞이므로 동시성 1 에서만 측정한다.
+"""
+
+import ctypes
+import ctypes.util
+from typing import Callable, Optional
+
+from cleancut.metrics import process_rss_bytes
+
+
+# glibc malloc.h
+M_TRIM_THRESHOLD = -1
+M_MMAP_THRESHOLD = -3
+MMAP_THRESHOLD_BYTES = 128 * 1024
+
+
+
+def configure_malloc() -> Optional[dict]:
+    """
+    큰 할당이 항상 mmap 으로 가고 해제 즉시 반환되도록 고정
+
+    Returns:
+        적용한 설정 (결과 파일 기록용), glibc 가 아니어서 적용하지 못했으면 None
+    """
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"))
+        applied = (
+            libc.mallopt(M_MMAP_THRESHOLD, MMAP_THRESHOLD_BYTES) == 1
+            and libc.mallopt(M_TRIM_THRESHOLD, MMAP_THRESHOLD_BYTES) == 1
+        )
+    except (OSError, AttributeError, TypeError):
+        return None
+    if not applied:
+        return None
+    return {"mmap_threshold": MMAP_THRESHOLD_BYTES, "trim_threshold": MMAP_THRESHOLD_BYTES}
+
+
+def _reset_peak() -> bool:
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def peak_rss_delta(fn: Callable[[], None], repeat: int = 3) -> Optional[float]:
+    """
+    fn 한 번이 늘리는 최대 RSS (MiB), repeat 번 중 최댓값 (configure_malloc() 을 먼저 호출)
+
+    Returns:
+        측정할 수 없는 환경(Linux 가 아니거나 권한 없음)이면 None
+    """
+    deltas = []
+    for _ in range(repeat):
+        baseline = process_rss_bytes()
+        if not _reset_peak():
+            return None
+        fn()
+        peak = _peak_rss_bytes()
+        if peak is None:
+            return None
+        deltas.append(max(peak - baseline, 0))
+    return round(max(deltas) / 2**20, 2)
@@ -0,0 +1,73 @@
+"""
+측정 유틸리티
+
+케이스 함수를 워밍업 후 지정한 동시성으로 반복 실행하며 지연 시간 분포,
+처리량, 파이프라인 단계별 시간(cleancut.metrics.track_stages)을 모은다.
+"""
+
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from cleancut.metrics import track_stages
+
+
+def _one(fn: Callable[[], None]) -> Tuple[float, Dict[str, float]]:
+    with track_stages() as timings:
+        start = time.perf_counter()
+        fn()
+        latency = time.perf_counter() - start
+    return latency, dict(timings.stages)
+
+
+def summarize(latencies: List[float], wall_seconds: float, stages: Dict[str, List[float]]) -> dict:
+    """지연 시간 목록을 밀리초 단위 통계로 요약"""
+    ms = np.asarray(latencies) * 1000
+    return {
+        "n": len(latencies),
+        "mean_ms": round(float(ms.mean()), 3),
+        "min_ms": round(float(ms.min()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "max_ms": round(float(ms.max()), 3),
+        "throughput_per_s": round(len(latencies) / wall_seconds, 3) if wall_seconds > 0 else None,
+        "stages_ms": {
+            name: round(float(np.mean(values)) * 1000, 3)
+            for name, values in sorted(stages.items())
+        },
+    }
+
+
+def run_case(fn: Callable[[], None], repeat: int, warmup: int = 1, concurrency: int = 1) -> dict:
+    """
+    케이스 함수 측정
+
+    Args:
+        fn: 한 번의 작업을 수행하는 함수
+        repeat: 측정 횟수
+        warmup: 측정 전 버리는 실행 횟수
+        concurrency: 동시에 실행할 스레드 수
+
+    Returns:
+        summarize() 결과
+    """
+    for _ in range(warmup):
+        fn()
+
+    wall_start = time.perf_counter()
+    if concurrency <= 1:
+        results = [_one(fn) for _ in range(repeat)]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(lambda _: _one(fn), range(repeat)))
+    wall_seconds = time.perf_counter() - wall_start
+
+    stages: Dict[str, List[float]] = defaultdict(list)
+    for _, stage_times in results:
+        for name, seconds in stage_times.items():
+            stages[name].append(seconds)
+    return summarize([latency for latency, _ in results], wall_seconds, stages)
@@ -0,0 +1,5 @@
+"""
+CleanCut 서버 공용 모듈
+
+server_birefnet.py 등 서버 진입점에서 함께 사용하는 코드를 모아둔 패키지
+"""
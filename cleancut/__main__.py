@@ -0,0 +1,321 @@
+"""
+오프라인 일괄 배경 제거 CLI
+
+HTTP 를 거치지 않고 폴더(또는 glob) 의 이미지를 한꺼번에 처리한다. 서버와 같은
+tier 엔진/인코딩(server_birefnet)을 쓰므로 결과가 POST /remove-background 와 같다.
+
+디코드 스레드 -> 배치 추론 (모델 forward 한 번에 --batch-size 장) -> 인코드/저장 스레드로
+파이프라인을 이루어, 추론하는 동안 다음 배치를 디코드하고 이전 배치를 인코딩한다.
+동시에 들고 있는 이미지 수는 워커 수와 배치 크기로 제한된다.
+
+처리한 파일은 출력 폴더의 manifest 에 기록하고, 다시 실행하면 (같은 옵션, 바뀌지 않은
+입력, 남아 있는 출력이면) 건너뛴다. --force 로 모두 다시 처리한다.
+
+python -m cleancut photos/ -o out/ [--quality high] [--format png|jpeg|svg|json]
+                   [--background '#ffffff'] [--crop] [--batch-size 4]
+                   [--decode-workers 2] [--encode-workers 2] [--force]
+python -m cleancut 'dump/**/*.jpg' -o out/
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff")
+MANIFEST_NAME = ".cleancut-manifest.jsonl"
+# 진행 상황 출력 간격 (처리한 이미지 수)
+PROGRESS_EVERY = 50
+
+# (입력 경로, 출력 상대 경로)
+Item = Tuple[str, str]
+
+
+def glob_root(pattern: str) -> str:
+    """glob 패턴에서 와일드카드가 없는 앞부분 폴더 ('dump/**/*.jpg' -> 'dump')"""
+    parts = []
+    for part in os.path.normpath(pattern).split(os.sep):
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    else:
+        # 와일드카드가 없으면 파일 하나
+        parts.pop()
+    return os.sep.join(parts) or ("/" if pattern.startswith("/") else ".")
+
+
+def collect_inputs(patterns: Iterable[str]) -> List[Item]:
+    """
+    입력 폴더/glob/파일 -> (입력 경로, 출력 상대 경로) 목록
+
+    폴더는 폴더 기준, glob 은 와일드카드 앞부분 폴더 기준 상대 경로를 유지한다
+    (파일 하나는 파일 이름). 확장자만 다른 입력은 출력 파일이 겹치므로 거부한다.
+
+    Raises:
+        ValueError: 둘 이상의 입력이 같은 출력 경로가 되는 경우
+    """
+    items: Dict[str, str] = {}
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, names in os.walk(pattern):
+                for name in sorted(names):
+                    if name.lower().endswith(IMAGE_EXTENSIONS):
+                        path = os.path.join(root, name)
+                        items.setdefault(os.path.abspath(path), os.path.relpath(path, pattern))
+            continue
+        root = glob_root(pattern)
+        for path in sorted(glob.glob(pattern, recursive=True)):
+            if os.path.isfile(path) and path.lower().endswith(IMAGE_EXTENSIONS):
+                items.setdefault(os.path.abspath(path), os.path.relpath(path, root))
+
+    # 출력 경로는 확장자를 결과 형식으로 바꾼 것
+    outputs: Dict[str, str] = {}
+    for path, relative in items.items():
+        stem = os.path.normcase(os.path.splitext(relative)[0])
+        other = outputs.setdefault(stem, path)
+        if other != path:
+            raise ValueError(f"{other} and {path} would be written to the same output ({stem}.*)")
+    return sorted(items.items(), key=lambda item: item[1])
+
+
+class Manifest:
+    """
+    처리 완료 기록 (JSON Lines, 한 줄에 파일 하나)
+
+    입력 크기/수정 시각과 옵션이 같고 출력 파일이 남아 있으면 처리된 것으로 본다.
+    실패한 파일도 (error 와 함께) 기록하지만 다음 실행에서 다시 처리한다.
+    """
+
+    def __init__(self, path: str, options: dict):
+        self.path = path
+        self.options = options
+        self._done: Dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # 중간에 끊긴 마지막 줄
+                        continue
+                    self._done[entry["input"]] = entry
+        self._file = None
+
+    @staticmethod
+    def _stat(path: str) -> dict:
+        stat = os.stat(path)
+        return {"bytes": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def done(self, path: str, output_dir: str) -> bool:
+        entry = self._done.get(path)
+        return (
+            entry is not None
+            and entry.get("error") is None
+            and entry["options"] == self.options
+            and {"bytes": entry["bytes"], "mtime_ns": entry["mtime_ns"]} == self._stat(path)
+            and os.path.exists(os.path.join(output_dir, entry["output"]))
+        )
+
+    def record(self, path: str, output: Optional[str], **data):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        entry = {"input": path, "output": output, **self._stat(path), "options": self.options, **data}
+        self._file.write(json.dumps(entry) + "\n")
+        # 도중에 멈춰도 그때까지 처리한 파일은 건너뛰도록
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def bounded_map(pool: ThreadPoolExecutor, fn: Callable, items: Iterable, window: int) -> Iterator[Future]:
+    """pool.map 과 같지만 끝나지 않은 작업을 window 개까지만 제출 (순서대로 완료된 Future)"""
+    pending: Deque[Future] = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= window:
+            future = pending.popleft()
+            future.exception()
+            yield future
+    while pending:
+        future = pending.popleft()
+        future.exception()
+        yield future
+
+
+def batches(futures: Iterable[Future], size: int) -> Iterator[List[Future]]:
+    batch = []
+    for future in futures:
+        batch.append(future)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run(args) -> int:
+    from fastapi import HTTPException
+
+    from server_birefnet import (
+        RESULT_EXTENSIONS, check_output_options, crop_to_subject, encode_result, resolve_tier, tiered_engines,
+    )
+
+    # 이미지마다 찍히는 서버 로그가 진행 상황 출력을 덮지 않도록
+    logging.getLogger().setLevel(logging.WARNING)
+
+    try:
+        tier = resolve_tier(args.quality)
+        check_output_options(args.background, args.background_file is not None, args.format)
+    except HTTPException as e:
+        raise SystemExit(f"error: {e.detail}")
+
+    try:
+        items = collect_inputs(args.inputs)
+    except ValueError as e:
+        raise SystemExit(f"error: {e}")
+    if not items:
+        raise SystemExit(f"No images found in {', '.join(args.inputs)}")
+    os.makedirs(args.output, exist_ok=True)
+
+    config = tiered_engines.engine(tier).config
+    options = {
+        "model": config.model_name, "input_size": config.input_size, "mask_mode": config.mask_mode,
+        "format": args.format, "background": args.background,
+        "background_file": os.path.abspath(args.background_file) if args.background_file else None,
+        "crop": args.crop, "crop_margin": args.crop_margin,
+    }
+    manifest = Manifest(os.path.join(args.output, MANIFEST_NAME), options)
+    pending = items if args.force else [item for item in items if not manifest.done(item[0], args.output)]
+    skipped = len(items) - len(pending)
+    print(f"{len(items)} images, {skipped} already processed, {len(pending)} to process "
+          f"(tier {tier}: {config.model_name}@{config.input_size})", file=sys.stderr)
+
+    processed = failed = 0
+    bytes_out = 0
+    start = time.perf_counter()
+    with tiered_engines.use(tier) as engine, \
+            ThreadPoolExecutor(args.decode_workers, thread_name_prefix="decode") as decode_pool, \
+            ThreadPoolExecutor(args.encode_workers, thread_name_prefix="encode") as encode_pool:
+        if not engine.loaded:
+            print("warning: model not loaded, using the fallback threshold method", file=sys.stderr)
+        background_image = None
+        if args.background == "image":
+            with open(args.background_file, "rb") as f:
+                background_image = engine.load_image(f.read())
+
+        def decode(item: Item):
+            with open(item[0], "rb") as f:
+                return engine.load_image(f.read())
+
+        def encode(item: Item, image, result) -> Tuple[str, int]:
+            try:
+                output_image, source = result, image
+                if args.crop:
+                    output_image, source, _ = crop_to_subject(result, image, args.crop_margin)
+                output, media_type = encode_result(
+                    engine, output_image, source, args.background, background_image, args.format
+                )
+            finally:
+                engine.release(result)
+            relative = f"{os.path.splitext(item[1])[0]}.{RESULT_EXTENSIONS[media_type]}"
+            path = os.path.join(args.output, relative)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(output)
+            return relative, len(output)
+
+        def fail(item: Item, error: BaseException):
+            nonlocal failed
+            failed += 1
+            print(f"FAILED {item[1]}: {error}", file=sys.stderr)
+            manifest.record(item[0], None, error=str(error))
+
+        def finish(item: Item, future: Future):
+            nonlocal processed, bytes_out
+            try:
+                relative, size = future.result()
+            except Exception as e:
+                fail(item, e)
+                return
+            manifest.record(item[0], relative)
+            processed += 1
+            bytes_out += size
+            if processed % PROGRESS_EVERY == 0:
+                elapsed = time.perf_counter() - start
+                print(f"{processed + failed}/{len(pending)} {processed / elapsed:.2f} images/s", file=sys.stderr)
+
+        # 디코드는 배치 두 개 분량까지 미리, 인코드는 워커 수의 두 배까지 밀어 둔다
+        decoded = bounded_map(decode_pool, decode, pending, window=max(args.batch_size * 2, args.decode_workers))
+        items_iter = iter(pending)
+        encoding: Deque[Tuple[Item, Future]] = deque()
+        try:
+            for batch in batches(decoded, args.batch_size):
+                images = []
+                for future in batch:
+                    item = next(items_iter)
+                    if future.exception() is not None:
+                        fail(item, future.exception())
+                        continue
+                    images.append((item, future.result()))
+                if not images:
+                    continue
+                try:
+                    results = engine.remove_background_batch([image for _, image in images])
+                except Exception as e:
+                    # 배치 하나가 실패해도 나머지 파일은 계속 처리
+                    for item, _ in images:
+                        fail(item, e)
+                    continue
+                for (item, image), result in zip(images, results):
+                    encoding.append((item, encode_pool.submit(encode, item, image, result)))
+                while len(encoding) > args.encode_workers * 2:
+                    finish(*encoding.popleft())
+        finally:
+            while encoding:
+                finish(*encoding.popleft())
+            manifest.close()
+
+    elapsed = time.perf_counter() - start
+    throughput = processed / elapsed if elapsed > 0 else 0.0
+    print(
+        f"processed={processed} failed={failed} skipped={skipped} "
+        f"elapsed={elapsed:.2f}s throughput={throughput:.2f} images/s "
+        f"output={bytes_out / 2**20:.1f}MB"
+    )
+    return 1 if failed else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from cleancut.compose import CROP_MARGIN
+
+    parser = argparse.ArgumentParser(prog="python -m cleancut", description="CleanCut offline batch background removal")
+    parser.add_argument("inputs", nargs="+", help="input folders, image files or glob patterns")
+    parser.add_argument("-o", "--output", required=True, help="output folder")
+    parser.add_argument("--quality", help="quality tier (default: CLEANCUT_DEFAULT_TIER)")
+    parser.add_argument("--format", help="png, jpeg, svg or json (same as the server format parameter)")
+    parser.add_argument("--background", help="checkerboard, blur, image or #RRGGBB (default: transparent)")
+    parser.add_argument("--background-file", help="background image for --background image")
+    parser.add_argument("--crop", action="store_true", help="crop results to the subject")
+    parser.add_argument("--crop-margin", type=int, default=CROP_MARGIN, help="margin around the subject (pixels)")
+    parser.add_argument("--batch-size", type=int, default=4, help="images per model forward pass")
+    parser.add_argument("--decode-workers", type=int, default=2, help="decode threads")
+    parser.add_argument("--encode-workers", type=int, default=2, help="encode/write threads")
+    parser.add_argument("--force", action="store_true", help="reprocess files already in the manifest")
+    args = parser.parse_args(argv)
+    if args.batch_size < 1 or args.decode_workers < 1 or args.encode_workers < 1:
+        parser.error("--batch-size and worker counts must be positive")
+    if args.crop_margin < 0:
+        parser.error("--crop-margin must not be negative")
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
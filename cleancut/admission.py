@@ -0,0 +1,90 @@
+"""
+메모리 예산 기반 요청 수락 제어
+
+요청마다 Engine.estimate_memory() 로 추정한 최악의 메모리를 예약하고,
+예약 합계가 예산을 넘으면 동기 요청은 바로 거절(503)하고 비동기 작업은
+자리가 날 때까지 기다린다. 큰 업로드 하나가 다른 요청들의 지연 시간을
+망치지 않도록 동시에 처리하는 양을 메모리 기준으로 제한한다.
+
+다른 요청이 없을 때는 예산보다 큰 요청도 하나만은 받는다 (영원히 거절되지 않도록).
+
+환경 변수:
+CLEANCUT_MEMORY_BUDGET_MB: 요청 처리에 쓸 메모리 예산 (기본값 2048, 0 이면 제한 없음)
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from cleancut.metrics import REGISTRY, Counter, Gauge
+
+
+class AdmissionRejected(RuntimeError):
+    """메모리 예산이 부족해 요청을 받지 않음"""
+
+
+class MemoryBudget:
+    """
+    예약 바이트 합계 관리
+
+    Args:
+        max_bytes: 예산 (0 이면 제한 없음)
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._reserved = 0
+        self._condition = threading.Condition()
+
+    @property
+    def reserved_bytes(self) -> int:
+        return self._reserved
+
+    def _fits(self, nbytes: int) -> bool:
+        return not self.max_bytes or self._reserved == 0 or self._reserved + nbytes <= self.max_bytes
+
+    @contextmanager
+    def reserve(self, nbytes: int, timeout: Optional[float] = 0) -> Iterator[None]:
+        """
+        블록 실행 동안 nbytes 예약
+
+        Args:
+            nbytes: 예약할 바이트
+            timeout: 자리가 날 때까지 기다릴 최대 시간 (0 이면 기다리지 않음, None 이면 무한)
+
+        Raises:
+            AdmissionRejected: timeout 안에 예약하지 못한 경우
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._fits(nbytes), timeout=timeout):
+                ADMISSION_REJECTED.inc()
+                raise AdmissionRejected(
+                    f"Server is busy (memory budget {self.max_bytes // 2**20}MB, "
+                    f"request needs {nbytes // 2**20}MB)"
+                )
+            self._reserved += nbytes
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._reserved -= nbytes
+                self._condition.notify_all()
+
+
+memory_budget = MemoryBudget(int(float(os.getenv("CLEANCUT_MEMORY_BUDGET_MB", "2048")) * 2**20))
+
+REGISTRY.register(Gauge(
+    "cleancut_admission_reserved_bytes",
+    "Worst-case memory reserved by requests being processed",
+    func=lambda: memory_budget.reserved_bytes,
+))
+REGISTRY.register(Gauge(
+    "cleancut_admission_budget_bytes",
+    "Memory budget for request processing (0 = unlimited)",
+    func=lambda: memory_budget.max_bytes,
+))
+ADMISSION_REJECTED = REGISTRY.register(Counter(
+    "cleancut_admission_rejected_total",
+    "Requests rejected because the memory budget was exhausted",
+))
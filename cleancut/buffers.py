@@ -0,0 +1,170 @@
+"""
+요청 간 재사용하는 numpy 버퍼 풀
+
+파이프라인 단계의 큰 중간 버퍼(전처리 입력/텐서, RGBA 출력)를 요청마다
+새로 할당하지 않고 반납된 버퍼를 다시 쓴다. 버퍼는 바이트 크기 등급
+(2의 거듭제곱 구간을 4등분, 최대 25% 여유)으로 묶어 보관하므로 이미지 크기가
+조금씩 달라도 재사용된다. acquire() 는 등급 크기의 블록에서 요청한
+shape/dtype 만큼을 잘라낸 뷰를 돌려준다.
+
+사용법:
+    buffer = buffer_pool.acquire((height, width, 4))
+    ...
+    buffer_pool.release(buffer)
+
+반납하지 않은 버퍼는 일반 배열처럼 GC 로 해제되고 사용 중 통계에서도 빠진다.
+반납한 뒤에는 그 버퍼(와 그 뷰, 예: Image.frombuffer 결과)를 더 이상 쓰면 안 된다.
+
+메트릭 (전역 buffer_pool):
+cleancut_buffer_pool_bytes{state="free"|"in_use"}
+cleancut_buffer_pool_buffers{state="free"|"in_use"}
+cleancut_buffer_pool_acquires_total{result="hit"|"miss"}
+cleancut_buffer_pool_discards_total
+"""
+
+import os
+import threading
+import weakref
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from cleancut.metrics import REGISTRY, Counter, Gauge
+
+# 이보다 작은 요청은 모두 이 등급으로 (작은 배열까지 풀에 넣지 않도록)
+MIN_CLASS_BYTES = 64 * 1024
+
+POOL_BYTES = REGISTRY.register(Gauge(
+    "cleancut_buffer_pool_bytes",
+    "Bytes held by the pipeline buffer pool",
+    ("state",),
+))
+POOL_BUFFERS = REGISTRY.register(Gauge(
+    "cleancut_buffer_pool_buffers",
+    "Buffers held by the pipeline buffer pool",
+    ("state",),
+))
+POOL_ACQUIRES = REGISTRY.register(Counter(
+    "cleancut_buffer_pool_acquires_total",
+    "Buffer acquisitions served from the pool (hit) or freshly allocated (miss)",
+    ("result",),
+))
+POOL_DISCARDS = REGISTRY.register(Counter(
+    "cleancut_buffer_pool_discards_total",
+    "Released buffers dropped because the pool was full",
+))
+
+
+def size_class(nbytes: int) -> int:
+    """nbytes 를 담는 가장 작은 등급 크기"""
+    if nbytes <= MIN_CLASS_BYTES:
+        return MIN_CLASS_BYTES
+    # (2^k, 2^(k+1)] 구간을 2^(k-2) 단위로 올림
+    step = 1 << ((nbytes - 1).bit_length() - 3)
+    return -(-nbytes // step) * step
+
+
+class BufferPool:
+    """
+    크기 등급별 빈 블록 목록
+
+    Args:
+        max_bytes: 풀에 보관할 빈 블록의 최대 총 바이트 (넘치면 반납된 블록을 버린다)
+        metrics: 전역 메트릭에 사용량을 기록할지 여부
+    """
+
+    def __init__(self, max_bytes: int = 256 * 2**20, metrics: bool = False):
+        self.max_bytes = max_bytes
+        self.metrics = metrics
+        self._free: Dict[int, List[np.ndarray]] = defaultdict(list)
+        # id(뷰) -> 블록
+        self._in_use: Dict[int, np.ndarray] = {}
+        self._free_bytes = 0
+        self._free_count = 0
+        self._in_use_bytes = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, shape, dtype=np.uint8) -> np.ndarray:
+        """shape/dtype 버퍼 하나를 꺼내거나 새로 할당 (내용은 초기화되지 않음)"""
+        dtype = np.dtype(dtype)
+        shape = tuple(int(n) for n in shape)
+        nbytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+        size = size_class(nbytes)
+
+        with self._lock:
+            free = self._free.get(size)
+            block = free.pop() if free else None
+            if block is not None:
+                self._free_bytes -= size
+                self._free_count -= 1
+        if self.metrics:
+            POOL_ACQUIRES.inc(result="hit" if block is not None else "miss")
+        if block is None:
+            block = np.empty(size, dtype=np.uint8)
+
+        buffer = block[:nbytes].view(dtype).reshape(shape)
+        key = id(buffer)
+        with self._lock:
+            self._in_use[key] = block
+            self._in_use_bytes += size
+            self._update_gauges()
+        # release() 없이 버려지면 사용 중 통계에서 뺀다
+        weakref.finalize(buffer, self._forget, key)
+        return buffer
+
+    def _take(self, key: int) -> Optional[np.ndarray]:
+        """사용 중 목록에서 제거 (self._lock 보유 상태에서 호출)"""
+        block = self._in_use.pop(key, None)
+        if block is not None:
+            self._in_use_bytes -= block.nbytes
+        return block
+
+    def _forget(self, key: int):
+        with self._lock:
+            if self._take(key) is not None:
+                self._update_gauges()
+
+    def release(self, buffer: np.ndarray):
+        """acquire() 로 받은 버퍼 반납 (풀 버퍼가 아니면 무시)"""
+        discarded = False
+        with self._lock:
+            block = self._take(id(buffer))
+            if block is None:
+                return
+            if self._free_bytes + block.nbytes > self.max_bytes:
+                discarded = True
+            else:
+                self._free[block.nbytes].append(block)
+                self._free_bytes += block.nbytes
+                self._free_count += 1
+            self._update_gauges()
+        if discarded and self.metrics:
+            POOL_DISCARDS.inc()
+
+    def _update_gauges(self):
+        if not self.metrics:
+            return
+        POOL_BYTES.set(self._free_bytes, state="free")
+        POOL_BYTES.set(self._in_use_bytes, state="in_use")
+        POOL_BUFFERS.set(self._free_count, state="free")
+        POOL_BUFFERS.set(len(self._in_use), state="in_use")
+
+    @property
+    def free_bytes(self) -> int:
+        return self._free_bytes
+
+    @property
+    def in_use_bytes(self) -> int:
+        return self._in_use_bytes
+
+    def clear(self):
+        """빈 블록을 모두 버린다 (사용 중인 버퍼는 그대로)"""
+        with self._lock:
+            self._free.clear()
+            self._free_bytes = 0
+            self._free_count = 0
+            self._update_gauges()
+
+
+buffer_pool = BufferPool(int(os.getenv("CLEANCUT_BUFFER_POOL_MB", "256")) * 2**20, metrics=True)
@@ -0,0 +1,178 @@
+"""
+결과 이미지 합성
+
+배경 제거 결과(RGBA)를 서버에서 배경 위에 합성해 RGB 로 돌려준다. 클라이언트가
+RGBA PNG 를 받아 직접 합성하지 않아도 되고, 불투명 결과는 JPEG 으로 보낼 수 있다.
+앱의 투명 배경 에셋(assets/images/checkerboard.png)도 같은 체커보드 생성기로 만든다
+(create_checkerboard.py).
+
+background (apply_background):
+checkerboard: 체커보드 (알파를 표시하지 못하는 클라이언트용 투명 미리보기)
+blur: 흐리게 한 원본 이미지
+image: 업로드된 배경 이미지 (결과 크기에 맞춰 가운데를 잘라 채움)
+#RRGGBB: 단색
+
+alpha_bbox() 는 결과를 피사체 영역(+여백)으로 잘라 인코딩/전송량을 줄일 때 쓴다.
+"""
+
+from typing import Optional, Sequence, Tuple, Union
+
+import numpy as np
+from PIL import Image, ImageFilter, ImageOps
+
+# 앱 에디터 화면의 투명 배경과 같은 값
+CHECKERBOARD_SQUARE = 20
+CHECKERBOARD_COLORS = ((230, 230, 230), (255, 255, 255))
+
+Color = Tuple[int, ...]
+
+# 서버 background 파라미터 값 (그 밖에 #RRGGBB 단색)
+BACKGROUNDS = ("checkerboard", "blur", "image")
+
+# 자동 자르기: 알파가 이 값보다 큰 픽셀을 피사체로 보고 (거의 투명한 잔여 알파 무시)
+CROP_ALPHA_THRESHOLD = 8
+# 자동 자르기 여백 (픽셀)
+CROP_MARGIN = 16
+
+# blur 배경: 가우시안 반경 (결과 이미지 픽셀 기준)
+BLUR_RADIUS = 20.0
+# blur 배경은 이 배율로 줄여서 흐린 뒤 다시 키운다 (큰 반경일수록 결과 차이가 없음)
+BLUR_DOWNSCALE = 4
+
+
+def checkerboard(size: Tuple[int, int], square_size: int = CHECKERBOARD_SQUARE,
+                 colors: Sequence[Color] = CHECKERBOARD_COLORS, mode: str = "RGB") -> Image.Image:
+    """
+    체커보드 이미지
+
+    두 칸 x 두 칸 타일 하나를 배열로 만든 뒤 np.tile 로 한 번에 채운다.
+
+    Args:
+        size: (width, height)
+        square_size: 칸 한 변 (픽셀)
+        colors: (왼쪽 위 칸 색, 나머지 칸 색), mode 의 채널 수와 같은 길이
+        mode: RGB 또는 RGBA
+    """
+    if square_size <= 0:
+        raise ValueError("square_size must be positive")
+    width, height = size
+    first, second = (np.asarray(color, dtype=np.uint8) for color in colors)
+    if mode not in ("RGB", "RGBA"):
+        raise ValueError("mode must be RGB or RGBA")
+    channels = len(mode)
+    if first.shape != (channels,) or second.shape != (channels,):
+        raise ValueError(f"colors must have {channels} channels for mode {mode}")
+
+    # 칸 좌표의 (x + y) 홀짝으로 색을 고른 2x2 타일
+    parity = np.indices((2, 2)).sum(axis=0) % 2
+    tile = np.where(parity[..., None] == 0, first, second).astype(np.uint8)
+    tile = tile.repeat(square_size, axis=0).repeat(square_size, axis=1)
+
+    reps = (-(-height // tile.shape[0]), -(-width // tile.shape[1]), 1)
+    pixels = np.tile(tile, reps)[:height, :width]
+    return Image.fromarray(np.ascontiguousarray(pixels))
+
+
+def flatten_on_checkerboard(image: Image.Image, square_size: int = CHECKERBOARD_SQUARE,
+                            colors: Sequence[Color] = CHECKERBOARD_COLORS) -> Image.Image:
+    """RGBA 이미지를 체커보드 위에 알파 합성한 RGB 이미지 (투명 미리보기)"""
+    return composite(image, checkerboard(image.size, square_size, colors))
+
+
+def alpha_bbox(image: Image.Image, margin: int = CROP_MARGIN,
+               threshold: int = CROP_ALPHA_THRESHOLD) -> Optional[Tuple[int, int, int, int]]:
+    """
+    알파가 threshold 보다 큰 픽셀을 감싸는 box 에 margin 을 더한 영역
+
+    알파 평면을 행/열 방향으로 한 번씩 줄여(any) 처음과 마지막 인덱스를 찾는다.
+
+    Returns:
+        (left, top, right, bottom), 이미지 밖으로 나가지 않게 자름. 피사체가 없으면 None
+    """
+    width, height = image.size
+    subject = np.asarray(image.getchannel("A")) > threshold
+    rows = np.flatnonzero(subject.any(axis=1))
+    if rows.size == 0:
+        return None
+    columns = np.flatnonzero(subject.any(axis=0))
+    return (
+        max(0, int(columns[0]) - margin),
+        max(0, int(rows[0]) - margin),
+        min(width, int(columns[-1]) + 1 + margin),
+        min(height, int(rows[-1]) + 1 + margin),
+    )
+
+
+def parse_color(value: str) -> Optional[Color]:
+    """#RRGGBB (또는 RRGGBB) -> (r, g, b), 색이 아니면 None"""
+    digits = value[1:] if value.startswith("#") else value
+    if len(digits) != 6:
+        return None
+    try:
+        return tuple(bytes.fromhex(digits))
+    except ValueError:
+        return None
+
+
+def is_background(value: str) -> bool:
+    return value in BACKGROUNDS or parse_color(value) is not None
+
+
+def composite(image: Image.Image, background: Union[Image.Image, Color]) -> Image.Image:
+    """
+    RGBA 이미지를 배경 위에 알파 합성한 RGB 이미지
+
+    Pillow 의 마스크 paste (C 로 구현된 out = (fg * a + bg * (255 - a)) / 255) 를 쓴다.
+    numpy uint16 행 묶음 계산보다 4배 정도 빠르다.
+
+    Args:
+        image: RGBA 이미지
+        background: 같은 크기의 RGB 이미지 (이 이미지에 바로 합성한다), 또는 단색 (r, g, b)
+    """
+    if not isinstance(background, Image.Image):
+        background = Image.new("RGB", image.size, tuple(background))
+    elif background.mode != "RGB":
+        background = background.convert("RGB")
+    background.paste(image, mask=image.getchannel("A"))
+    return background
+
+
+def blurred(image: Image.Image, radius: float = BLUR_RADIUS) -> Image.Image:
+    """원본을 흐린 RGB 배경 (줄인 이미지를 흐린 뒤 원래 크기로)"""
+    image = image.convert("RGB")
+    factor = BLUR_DOWNSCALE if min(image.size) >= BLUR_DOWNSCALE * 16 else 1
+    small = image.reduce(factor) if factor > 1 else image
+    small = small.filter(ImageFilter.GaussianBlur(radius / factor))
+    return small.resize(image.size, Image.Resampling.BILINEAR)
+
+
+def apply_background(image: Image.Image, background: str, source: Optional[Image.Image] = None,
+                     background_image: Optional[Image.Image] = None) -> Image.Image:
+    """
+    RGBA 결과를 background 위에 합성한 RGB 이미지
+
+    Args:
+        image: 배경 제거 결과 (RGBA)
+        background: BACKGROUNDS 중 하나, 또는 #RRGGBB
+        source: 원본 RGB 이미지 (blur)
+        background_image: 배경 이미지 (image)
+
+    Raises:
+        ValueError: 알 수 없는 background, 또는 필요한 이미지가 없는 경우
+    """
+    if background == "checkerboard":
+        return flatten_on_checkerboard(image)
+    if background == "blur":
+        if source is None:
+            raise ValueError("blur background needs the source image")
+        return composite(image, blurred(source))
+    if background == "image":
+        if background_image is None:
+            raise ValueError("image background needs a background image")
+        # 결과 크기를 덮도록 키운 뒤 가운데를 잘라낸다
+        fitted = ImageOps.fit(background_image.convert("RGB"), image.size, Image.Resampling.LANCZOS)
+        return composite(image, fitted)
+    color = parse_color(background)
+    if color is None:
+        raise ValueError(f"background must be one of {', '.join(BACKGROUNDS)} or a #RRGGBB color")
+    return composite(image, color)
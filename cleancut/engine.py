@@ -0,0 +1,821 @@
+"""
+배경 제거 추론 엔진
+
+server_birefnet.py, app_fastapi.py, app.py 가 함께 사용하는 단일 파이프라인.
+진입점별로 달랐던 동작(모델, 마스크 이진화 여부, 폴백 임계값, 정규화,
+마스크 리사이즈 방식)은 EngineConfig 로 설정한다.
+
+파이프라인:
+open (헤더만 읽어 크기 검사, 큰 JPEG 은 축소 디코드 설정) -> decode
+-> prepare (크기 검사/축소, RGB, EXIF 회전) -> preprocess -> forward
+-> postprocess (마스크 다듬기, 마스크 리사이즈, 알파 합성) -> encode
+
+마스크 다듬기 (mask_mode):
+soft: 확률 그대로, binary: mask_threshold 로 이진화 (둘 다 양자화 단계에서 처리, 추가 비용 없음)
+guided: 이미지 밝기를 가이드로 한 guided filter 로 경계를 이미지 윤곽에 맞춘다.
+모델 해상도 마스크에서, 계수는 GUIDED_SUBSAMPLE 배 줄인 해상도의 박스 필터로 계산한다.
+
+coarse_to_fine 을 켜면 큰 이미지는 coarse_size 로 한 번 추론한 뒤, 경계가 불확실한
+영역을 덮는 원본 해상도 타일만 input_size 로 다시 추론해 알파를 덮어쓴다.
+
+마스크는 forward 이후 float32 텐서로 남아 있다가 한 번만 원본 크기로 보간되고,
+곧바로 uint8 알파 평면으로 양자화된다 (PIL 왕복 없음).
+전처리 입력/텐서와 RGBA 결과는 버퍼 풀(cleancut.buffers)에서 꺼낸 버퍼를 쓴다.
+RGBA 결과는 인터리브 버퍼에 RGB 와 알파를 직접 써서 만들고, 인코딩이 끝나면
+Engine.release() 로 풀에 돌려준다.
+"""
+
+import io
+import logging
+import os
+import threading
+import weakref
+from dataclasses import dataclass, fields
+from typing import BinaryIO, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import torch
+from PIL import ExifTags, Image, ImageOps
+
+from cleancut.buffers import buffer_pool
+from cleancut.metrics import BATCH_SIZE, REGISTRY, Counter, is_tracked, stage
+from cleancut.models import load_model
+from cleancut.profiler import profile_session
+
+logger = logging.getLogger(__name__)
+
+MASK_MODES = ("soft", "binary", "guided")
+MASK_RESAMPLES = ("bilinear", "bicubic")
+
+# 마스크 보간/RGB 복사를 한 번에 처리하는 행 수 (원본 크기 임시 배열을 피하기 위해)
+UPSAMPLE_STRIP_ROWS = 256
+COPY_STRIP_ROWS = 256
+# F.interpolate(mode="bicubic") 와 같은 cubic convolution 계수
+CUBIC_A = -0.75
+
+# guided filter 계수(a, b)를 계산하는 해상도 배율 (fast guided filter)
+GUIDED_SUBSAMPLE = 4
+
+# 배경을 합성한 결과의 JPEG 품질
+JPEG_QUALITY = 90
+
+# PIL 은 RGB 도 픽셀당 4바이트로 보관한다
+PIL_BYTES_PER_PIXEL = 4
+
+# open() 에서 축소 디코드(draft)한 이미지의 원래 크기 (prepare 가 원래 크기 기준으로 축소하도록)
+SOURCE_SIZE_INFO_KEY = "cleancut_source_size"
+
+# 가로/세로가 바뀌는 EXIF 오리엔테이션 (TRANSPOSE, ROTATE_270, TRANSVERSE, ROTATE_90)
+TRANSPOSING_ORIENTATIONS = (5, 6, 7, 8)
+
+# coarse-to-fine 타일 창에서 가장자리 1/TILE_CONTEXT_DIVISOR 는 문맥으로만 쓰고 결과는 버린다
+TILE_CONTEXT_DIVISOR = 8
+
+# (left, top, right, bottom)
+Box = Tuple[int, int, int, int]
+
+# BiRefNet 학습 시 사용된 ImageNet 정규화 값
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+
+
+@dataclass
+class EngineConfig:
+    """
+    파이프라인 설정
+
+    모든 값은 CLEANCUT_<필드 이름 대문자> 환경 변수로 덮어쓸 수 있다
+    (예: CLEANCUT_MASK_MODE=binary). model_name 은 CLEANCUT_MODEL 을 사용한다.
+    """
+
+    # Hugging Face 모델 ID, 또는 "stub" (cleancut.stub_model)
+    model_name: str = "ZhengPeng7/BiRefNet_HR"
+    # 모델 입력 한 변 크기 (정사각형으로 리사이즈)
+    input_size: int = 1024
+    # ImageNet 평균/표준편차 정규화 여부 (False 면 0-1 스케일만)
+    normalize: bool = False
+    # soft: 확률을 그대로 알파로 사용, binary: mask_threshold 로 이진화,
+    # guided: guided filter 로 경계를 이미지 윤곽에 맞춤
+    mask_mode: str = "soft"
+    mask_threshold: float = 0.5
+    # guided filter 창 반경 (모델 해상도 픽셀) 과 정규화 값 (클수록 부드러움)
+    guided_radius: int = 16
+    guided_eps: float = 1e-3
+    # 확률 마스크를 원본 크기로 되돌리는 텐서 보간 방식
+    mask_resample: str = "bilinear"
+    # 모델이 없을 때 폴백: RGB 모두 이 값보다 밝으면 배경으로 간주
+    fallback_threshold: int = 240
+    # 입력 이미지 크기 제한 (이보다 작으면 거부, max_side 를 넘으면 downscale_to 로 축소)
+    min_side: int = 100
+    max_side: int = 4096
+    downscale_to: int = 2048
+    # 디코드할 최대 픽셀 수. 넘으면 JPEG 은 축소 디코드, 그 밖의 형식은 거부
+    max_pixels: int = 40_000_000
+    # input_size 보다 큰 이미지: coarse_size 로 전체를 추론한 뒤 불확실한 경계만
+    # 원본 해상도 input_size 타일로 다시 추론
+    coarse_to_fine: bool = False
+    coarse_size: int = 512
+    # coarse 확률이 (edge_band, 1 - edge_band) 이면 불확실한 경계로 본다
+    edge_band: float = 0.05
+
+    @classmethod
+    def from_env(cls, **defaults) -> "EngineConfig":
+        """defaults 를 기본값으로, 환경 변수가 있으면 그 값으로 설정 생성"""
+        values = {}
+        for field in fields(cls):
+            env_name = "CLEANCUT_MODEL" if field.name == "model_name" else f"CLEANCUT_{field.name.upper()}"
+            raw = os.getenv(env_name)
+            if raw is None:
+                if field.name in defaults:
+                    values[field.name] = defaults[field.name]
+                continue
+            if field.type in (bool, "bool"):
+                values[field.name] = raw.lower() in ("1", "true", "yes")
+            elif field.type in (int, "int"):
+                values[field.name] = int(raw)
+            elif field.type in (float, "float"):
+                values[field.name] = float(raw)
+            else:
+                values[field.name] = raw
+        config = cls(**values)
+        config.validate()
+        return config
+
+    def validate(self):
+        if self.mask_mode not in MASK_MODES:
+            raise ValueError(f"mask_mode must be one of {MASK_MODES}")
+        if self.mask_resample not in MASK_RESAMPLES:
+            raise ValueError(f"mask_resample must be one of {MASK_RESAMPLES}")
+        if self.guided_radius <= 0 or self.guided_eps <= 0:
+            raise ValueError("guided_radius and guided_eps must be positive")
+        if not 0 < self.edge_band < 0.5:
+            raise ValueError("edge_band must be between 0 and 0.5")
+
+
+def _cubic_near(x: torch.Tensor) -> torch.Tensor:
+    """|x| <= 1 구간 cubic convolution 계수"""
+    return ((CUBIC_A + 2) * x - (CUBIC_A + 3)) * x * x + 1
+
+
+def _cubic_far(x: torch.Tensor) -> torch.Tensor:
+    """1 < |x| < 2 구간 cubic convolution 계수"""
+    return ((CUBIC_A * x - 5 * CUBIC_A) * x + 8 * CUBIC_A) * x - 4 * CUBIC_A
+
+
+def _row_taps(out_size: int, in_size: int, mode: str, device) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    출력 행마다 섞을 입력 행 인덱스와 가중치
+
+    F.interpolate(align_corners=False) 와 같은 좌표 규칙을 따른다.
+
+    Returns:
+        (out_size, taps) 인덱스, (out_size, taps) 가중치 (bilinear 2탭, bicubic 4탭)
+    """
+    src = (torch.arange(out_size, dtype=torch.float32, device=device) + 0.5) * (in_size / out_size) - 0.5
+    if mode == "bilinear":
+        src = src.clamp_(min=0)
+    first = src.floor()
+    t = src - first
+    first = first.long()
+    if mode == "bilinear":
+        index = torch.stack([first, first + 1], dim=1)
+        weight = torch.stack([1 - t, t], dim=1)
+    else:
+        index = torch.stack([first - 1, first, first + 1, first + 2], dim=1)
+        weight = torch.stack([_cubic_far(t + 1), _cubic_near(t), _cubic_near(1 - t), _cubic_far(2 - t)], dim=1)
+    return index.clamp_(0, in_size - 1), weight
+
+
+def upsample_alpha(probs: torch.Tensor, size, mode: str = "bilinear",
+                   threshold: Optional[float] = None, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    확률 마스크를 원본 크기로 한 번 보간해 uint8 알파 평면으로 양자화
+
+    원본 크기 float 중간 결과를 만들지 않도록 UPSAMPLE_STRIP_ROWS 행씩 처리한다.
+    각 행 묶음은 세로 보간(입력 행 가중합) 후 F.interpolate 로 가로만 보간하므로
+    결과는 전체를 한 번에 F.interpolate 한 것과 같다 (float 반올림으로 드물게 ±1).
+
+    Args:
+        probs: (B, 1, h, w) 0-1 확률 텐서 (CPU/GPU)
+        size: 출력 (width, height), 배치 내 모든 마스크에 공통
+        mode: bilinear 또는 bicubic
+        threshold: 주어지면 이 값으로 이진화
+        out: 결과를 쓸 (B, height, width) uint8 배열, 인터리브 버퍼의 채널 뷰도 가능
+            (없으면 새로 할당)
+
+    Returns:
+        (B, height, width) uint8 알파 평면
+    """
+    width, height = size
+    batch, _, in_height, in_width = probs.shape
+    probs = probs.float()
+    if out is None:
+        out = np.empty((batch, height, width), dtype=np.uint8)
+    target = torch.from_numpy(out)
+    index, weight = _row_taps(height, in_height, mode, probs.device)
+
+    for top in range(0, height, UPSAMPLE_STRIP_ROWS):
+        bottom = min(top + UPSAMPLE_STRIP_ROWS, height)
+        rows = bottom - top
+        strip = probs[:, :, index[top:bottom, 0]] * weight[top:bottom, 0, None]
+        for tap in range(1, index.shape[1]):
+            strip += probs[:, :, index[top:bottom, tap]] * weight[top:bottom, tap, None]
+        if in_width != width:
+            strip = torch.nn.functional.interpolate(
+                strip,
+                size=(rows, width),
+                mode=mode,
+                align_corners=False
+            )
+        if threshold is not None:
+            strip = strip.gt_(threshold)
+        # bicubic 은 0-1 범위를 벗어날 수 있으므로 양자화 전에 자른다
+        strip = strip.mul_(255.0).clamp_(0.0, 255.0).round_()
+        # float -> uint8 변환과 장치 -> CPU 복사를 한 번에 out 으로
+        target[:, top:bottom].copy_(strip[:, 0])
+    return out
+
+
+EDGE_TILES = REGISTRY.register(Counter(
+    "cleancut_coarse_to_fine_tiles_total",
+    "Full-resolution tiles in coarse-to-fine inference, re-inferred on the edge band (refined) or kept coarse (skipped)",
+    ("result",),
+))
+
+
+def box_filter(x: torch.Tensor, radius: int) -> torch.Tensor:
+    """(B, C, H, W) 의 (2r+1)x(2r+1) 창 평균 (가장자리는 창 안의 픽셀만으로)"""
+    return torch.nn.functional.avg_pool2d(
+        x, 2 * radius + 1, stride=1, padding=radius, count_include_pad=False
+    )
+
+
+def guided_filter(guide: torch.Tensor, src: torch.Tensor, radius: int, eps: float,
+                  subsample: int = GUIDED_SUBSAMPLE) -> torch.Tensor:
+    """
+    guide 의 윤곽을 따라 src 를 다듬는 fast guided filter
+
+    선형 계수 a, b 를 subsample 배 줄인 해상도에서 박스 필터로 구한 뒤
+    원래 해상도로 보간해 q = a * guide + b 를 만든다.
+
+    Args:
+        guide: (B, 1, H, W) 0-1 밝기
+        src: (B, 1, H, W) 0-1 확률
+        radius: 창 반경 (원래 해상도 픽셀)
+        eps: 정규화 값
+
+    Returns:
+        (B, 1, H, W) 0-1 확률
+    """
+    height, width = src.shape[-2:]
+    small = (max(1, height // subsample), max(1, width // subsample))
+    radius = max(1, radius // subsample)
+    guide_small = torch.nn.functional.interpolate(guide, size=small, mode="area")
+    src_small = torch.nn.functional.interpolate(src, size=small, mode="area")
+
+    mean_guide = box_filter(guide_small, radius)
+    mean_src = box_filter(src_small, radius)
+    covariance = box_filter(guide_small * src_small, radius) - mean_guide * mean_src
+    variance = box_filter(guide_small * guide_small, radius) - mean_guide * mean_guide
+    a = covariance / (variance + eps)
+    b = mean_src - a * mean_guide
+
+    # a, b 를 채널로 묶어 한 번에 평균/보간
+    coefficients = torch.nn.functional.interpolate(
+        box_filter(torch.cat([a, b], dim=1), radius),
+        size=(height, width),
+        mode="bilinear",
+        align_corners=False
+    )
+    return torch.addcmul(coefficients[:, 1:], coefficients[:, :1], guide).clamp_(0.0, 1.0)
+
+
+class ImageTooLarge(ValueError):
+    """픽셀 수가 max_pixels 를 넘어 디코드하지 않음"""
+
+
+class Engine:
+    """
+    배경 제거 파이프라인
+
+    Args:
+        config: 파이프라인 설정 (기본값: EngineConfig())
+    """
+
+    def __init__(self, config: Optional[EngineConfig] = None):
+        self.config = config or EngineConfig()
+        self.model = None
+        self.device = None
+        # id(결과 이미지/입력 텐서) -> 그 객체가 감싸고 있는 풀 버퍼
+        self._leases: Dict[int, np.ndarray] = {}
+        self._leases_lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.model is not None
+
+    def load(self) -> bool:
+        """모델 로드, 실패하면 False (폴백 모드로 동작)"""
+        try:
+            self.model, self.device = load_model(self.config.model_name)
+            logger.info("Model loaded successfully")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to load model: {e}")
+            logger.info("Using fallback mode (simple threshold background removal)")
+            return False
+
+    def output_size(self, size: Tuple[int, int]) -> Tuple[int, int]:
+        """prepare() 가 만드는 이미지 크기 (max_side 를 넘으면 긴 변을 downscale_to 로 축소)"""
+        config = self.config
+        width, height = size
+        if width <= config.max_side and height <= config.max_side:
+            return width, height
+        max_size = config.downscale_to
+        if width > height:
+            return max_size, int(height * (max_size / width))
+        return int(width * (max_size / height)), max_size
+
+    def open(self, source: Union[bytes, BinaryIO], formats: Optional[Sequence[str]] = None) -> Image.Image:
+        """
+        헤더만 읽어 크기를 검사 (픽셀 데이터는 아직 디코드하지 않음)
+
+        축소될 JPEG 은 draft() 로 1/2, 1/4, 1/8 스케일 디코드를 설정해
+        원본 해상도 전체를 메모리에 올리지 않는다.
+
+        Args:
+            source: 이미지 바이트, 또는 파일 객체 (스풀된 업로드 파일을 복사 없이 그대로 읽음)
+            formats: 허용할 Pillow 형식 이름 (None 이면 Pillow 가 아는 모든 형식)
+
+        Raises:
+            ValueError: 이미지가 너무 작은 경우
+            ImageTooLarge: 축소 디코드로도 max_pixels 를 넘는 경우
+        """
+        config = self.config
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = io.BytesIO(source)
+        with stage("decode"):
+            try:
+                image = Image.open(source, formats=formats)
+            except Image.DecompressionBombError as e:
+                raise ImageTooLarge(str(e))
+
+            width, height = image.size
+            if width < config.min_side or height < config.min_side:
+                raise ValueError(f"Image too small (minimum {config.min_side}x{config.min_side})")
+
+            target = self.output_size(image.size)
+            if image.format == "JPEG" and target != image.size:
+                # 최종 크기 이상을 유지하는 가장 작은 스케일로 디코드
+                image.draft(image.mode, target)
+                image.info[SOURCE_SIZE_INFO_KEY] = (width, height)
+
+            if image.width * image.height > config.max_pixels:
+                raise ImageTooLarge(
+                    f"Image too large ({width}x{height}, maximum {config.max_pixels} pixels)"
+                )
+        return image
+
+    def decode(self, source: Union[bytes, BinaryIO, Image.Image],
+               formats: Optional[Sequence[str]] = None) -> Image.Image:
+        """
+        업로드된 이미지 디코드
+
+        Args:
+            source: open() 결과, 이미지 바이트, 또는 파일 객체
+            formats: 허용할 Pillow 형식 이름 (source 가 이미지가 아닐 때)
+        """
+        image = source if isinstance(source, Image.Image) else self.open(source, formats)
+        with stage("decode"):
+            image.load()
+        return image
+
+    def estimate_memory(self, image: Image.Image) -> int:
+        """
+        open() 결과 이미지 한 장이 파이프라인에서 동시에 잡는 최대 바이트 (상한 추정)
+
+        디코드 원본, 축소/RGB 변환본, RGBA 결과 버퍼, 모델 입력(리사이즈본, 스테이징,
+        float 텐서), 마스크(확률, 보간 행 묶음), PNG 출력을 합한다.
+        모델 가중치와 활성화 메모리는 요청 수와 무관하므로 제외한다.
+        """
+        width, height = image.size
+        out_width, out_height = self.output_size(image.info.get(SOURCE_SIZE_INFO_KEY, image.size))
+        input_pixels = self.config.input_size ** 2
+        decoded = width * height * PIL_BYTES_PER_PIXEL
+        # 축소본 + RGB 변환본 + RGBA 결과 버퍼
+        working = out_width * out_height * PIL_BYTES_PER_PIXEL * 3
+        # 리사이즈본 + RGBX 스테이징 + (1, 3, S, S) float32
+        model_input = input_pixels * (PIL_BYTES_PER_PIXEL * 2 + 3 * 4)
+        # 확률 마스크 + 세로/가로 보간 행 묶음 (float32)
+        mask = input_pixels * 4 + UPSAMPLE_STRIP_ROWS * (self.config.input_size + out_width) * 4
+        # 압축이 안 되는 최악의 PNG
+        encoded = out_width * out_height * 4
+        return decoded + working + model_input + mask + encoded
+
+    def prepare(self, image: Image.Image) -> Image.Image:
+        """
+        디코드된 이미지를 모델 입력용 RGB 이미지로 변환
+
+        최소 크기 검사, 큰 이미지 자동 리사이징, EXIF 회전 보정을 수행한다.
+        open() 에서 축소 디코드된 이미지도 원래 크기 기준의 같은 크기로 축소한다.
+
+        회전은 축소가 끝난 작은 이미지에 적용한다. output_size() 는 가로/세로를
+        바꿔도 같은 결과를 주므로 저장된 방향 그대로 축소한 뒤 회전해도
+        회전 후 축소한 것과 같은 이미지가 나온다 (원본 해상도 회전 복사본이 없음).
+
+        Raises:
+            ValueError: 이미지가 너무 작은 경우
+        """
+        config = self.config
+        source_size = image.info.get(SOURCE_SIZE_INFO_KEY, image.size)
+        try:
+            orientation = image.getexif().get(ExifTags.Base.Orientation, 1)
+        except Exception:
+            orientation = 1
+
+        # 이미지 크기 체크 (회전과 무관)
+        width, height = image.size
+        if width < config.min_side or height < config.min_side:
+            raise ValueError(f"Image too small (minimum {config.min_side}x{config.min_side})")
+
+        with stage("resize"):
+            new_width, new_height = self.output_size(source_size)
+            if (new_width, new_height) != image.size:
+                # 큰 이미지는 자동 리사이징
+                if orientation in TRANSPOSING_ORIENTATIONS and new_height != height:
+                    # PIL 은 가로 -> 세로 순으로 보간한다. 회전 후 축소와 같은 결과가 나오도록
+                    # 회전 뒤의 가로축(저장된 세로축)을 먼저 보간
+                    image = image.resize((width, new_height), Image.Resampling.LANCZOS)
+                image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+                logger.info(f"Resized image from {width}x{height} to {new_width}x{new_height}")
+
+            # RGB로 변환 (RGBA 이미지 처리를 위해)
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+
+        # EXIF 오리엔테이션 처리 (축소된 이미지에만)
+        with stage("exif_transpose"):
+            try:
+                # EXIF 데이터에 따라 이미지 자동 회전
+                image = ImageOps.exif_transpose(image)
+            except Exception as e:
+                logger.debug(f"EXIF processing skipped: {e}")
+
+        return image
+
+    def load_image(self, source: Union[bytes, BinaryIO], formats: Optional[Sequence[str]] = None) -> Image.Image:
+        """decode + prepare"""
+        return self.prepare(self.decode(source, formats))
+
+    def preprocess(self, image: Image.Image, size: Optional[int] = None) -> torch.Tensor:
+        """RGB 이미지를 (1, 3, S, S) 입력 텐서로 변환 (S 기본값: input_size)"""
+        size = size or self.config.input_size
+        with stage("preprocess"):
+            # 모델 입력 크기로 리사이즈 (BiRefNet은 다양한 크기 지원)
+            image_resized = image.resize((size, size), Image.Resampling.LANCZOS)
+
+            # 풀 버퍼에 RGBX 로 복사한 뒤 풀 float 버퍼로 (batch_size, channels, height, width) 변환
+            staging = buffer_pool.acquire((size, size, 4))
+            tensor_buffer = buffer_pool.acquire((1, 3, size, size), np.float32)
+            try:
+                self.copy_rgbx(image_resized, staging)
+                image_tensor = torch.from_numpy(tensor_buffer)
+                image_tensor[0].copy_(torch.from_numpy(staging)[..., :3].permute(2, 0, 1))
+            except Exception:
+                buffer_pool.release(tensor_buffer)
+                raise
+            finally:
+                buffer_pool.release(staging)
+
+            # 0-1 범위 (와 정규화) 는 제자리 연산으로
+            image_tensor.div_(255.0)
+            if self.config.normalize:
+                image_tensor.sub_(torch.tensor(IMAGENET_MEAN).view(1, 3, 1, 1))
+                image_tensor.div_(torch.tensor(IMAGENET_STD).view(1, 3, 1, 1))
+
+            if self.device is not None and self.device.type != "cpu":
+                # 장치로 복사했으면 CPU 버퍼는 바로 반납
+                device_tensor = image_tensor.to(self.device)
+                buffer_pool.release(tensor_buffer)
+                return device_tensor
+            self._lease(image_tensor, tensor_buffer)
+            return image_tensor
+
+    def infer(self, image: Image.Image, size: Optional[int] = None) -> torch.Tensor:
+        """preprocess + forward (입력 텐서 버퍼는 forward 직후 반납)"""
+        image_tensor = self.preprocess(image, size)
+        try:
+            return self.forward(image_tensor, image)
+        finally:
+            self.release(image_tensor)
+
+    def forward(self, image_tensor: torch.Tensor, image: Image.Image) -> torch.Tensor:
+        """
+        모델 추론
+
+        Returns:
+            모델 입력 해상도의 전경 확률 텐서 (B, 1, H, W), 0-1 float32, 모델 장치에 유지
+        """
+        model = self.model
+        with stage("forward"):
+            if is_tracked():
+                BATCH_SIZE.observe(image_tensor.shape[0])
+
+            with torch.no_grad(), profile_session.torch_forward():
+                try:
+                    # predict 메서드가 있는 경우 (PIL Image를 직접 받음)
+                    if hasattr(model, 'predict'):
+                        mask = model.predict(image)
+                        # mask가 PIL Image인 경우 numpy로 변환
+                        if isinstance(mask, Image.Image):
+                            mask = np.array(mask) / 255.0
+                        mask = torch.as_tensor(np.asarray(mask, dtype=np.float32))
+                        return mask.view(1, 1, *mask.shape[-2:])
+
+                    # 일반적인 forward 방식
+                    output = model(image_tensor)
+
+                    # 출력 형식에 따라 처리
+                    if isinstance(output, dict):
+                        mask = output.get('logits', output.get('out', output))
+                    elif isinstance(output, (list, tuple)):
+                        # BiRefNet이 리스트를 반환하는 경우 (multi-scale output)
+                        # 마지막 스케일의 출력 사용
+                        mask = output[-1]
+                    else:
+                        mask = output
+
+                    # mask가 텐서가 아닌 경우 텐서로 변환
+                    if not isinstance(mask, torch.Tensor):
+                        mask = torch.as_tensor(mask)
+
+                    # 시그모이드 적용하여 0-1 범위로 변환 (보간은 postprocess 에서 텐서 그대로)
+                    if mask.dim() == 3:
+                        mask = mask.unsqueeze(1)
+                    return torch.sigmoid(mask.float())
+                except Exception as e:
+                    logger.error(f"Model inference failed: {e}")
+                    raise
+
+    def postprocess(self, image: Image.Image, probs: torch.Tensor) -> Image.Image:
+        """
+        확률 마스크를 원본 크기 알파 채널로 만들어 RGBA 이미지 합성
+
+        결과는 풀 버퍼를 감싼 읽기 전용 이미지이다. 인코딩 후 release() 로 반납한다.
+        """
+        return self._wrap_rgba(image.size, self._compose(image, probs))
+
+    def _compose(self, image: Image.Image, probs: torch.Tensor) -> np.ndarray:
+        """RGB 와 보간한 알파를 채운 (H, W, 4) 풀 버퍼"""
+        config = self.config
+        width, height = image.size
+        buffer = buffer_pool.acquire((height, width, 4))
+        try:
+            with stage("compose"):
+                self.copy_rgbx(image, buffer)
+
+            probs = self.refine_mask(probs[:1], image)
+            with stage("mask_resize"):
+                # 알파를 인터리브 버퍼의 A 채널에 바로 양자화
+                upsample_alpha(probs, image.size, config.mask_resample, self._mask_threshold(),
+                               out=buffer[None, ..., 3])
+        except Exception:
+            buffer_pool.release(buffer)
+            raise
+        return buffer
+
+    def refine_mask(self, probs: torch.Tensor, image: Image.Image) -> torch.Tensor:
+        """
+        mask_mode=guided 면 모델 해상도로 줄인 이미지 밝기를 가이드로 확률 마스크를 다듬는다
+
+        soft/binary 는 그대로 돌려준다 (이진화는 upsample_alpha 의 양자화 단계에서).
+        """
+        config = self.config
+        if config.mask_mode != "guided":
+            return probs
+        with stage("mask_refine"):
+            height, width = probs.shape[-2:]
+            # 한 채널로 바꾼 뒤 줄인다 (RGB 로 줄이는 것보다 3배 가까이 빠름)
+            small = image.convert("L").resize((width, height), Image.Resampling.BILINEAR)
+            guide = torch.from_numpy(np.asarray(small, dtype=np.float32) / 255.0).to(probs.device)
+            return guided_filter(guide[None, None], probs.float(), config.guided_radius, config.guided_eps)
+
+    def _mask_threshold(self) -> Optional[float]:
+        config = self.config
+        return config.mask_threshold if config.mask_mode == "binary" else None
+
+    def _wrap_rgba(self, size: Tuple[int, int], buffer: np.ndarray) -> Image.Image:
+        """풀 버퍼를 감싼 RGBA 결과 이미지 (release() 로 버퍼 반납)"""
+        image_rgba = Image.frombuffer("RGBA", size, buffer, "raw", "RGBA", 0, 1)
+        self._lease(image_rgba, buffer)
+        return image_rgba
+
+    def edge_tiles(self, probs: torch.Tensor, size: Tuple[int, int]) -> List[Tuple[Box, Box]]:
+        """
+        coarse 확률 마스크에서 불확실한 경계를 덮는 원본 해상도 타일
+
+        이미지를 input_size 창으로 나누되 창 가장자리(1/TILE_CONTEXT_DIVISOR)는 문맥으로만
+        쓰고, 창 안쪽 영역이 서로 맞닿게 배치한다. 안쪽 영역에 불확실한 coarse 화소가
+        하나라도 있는 타일만 돌려준다.
+
+        Args:
+            probs: (1, 1, h, w) coarse 확률 텐서
+            size: 원본 (width, height)
+
+        Returns:
+            [(창 box, 안쪽 영역 box)], box 는 (left, top, right, bottom)
+        """
+        config = self.config
+        width, height = size
+        coarse = probs[0, 0].float()
+        uncertain = (coarse > config.edge_band) & (coarse < 1 - config.edge_band)
+        # 경계가 coarse 화소 사이에 걸친 경우도 덮도록 한 칸 팽창
+        uncertain = torch.nn.functional.max_pool2d(uncertain[None, None].float(), 3, stride=1, padding=1)
+        uncertain = uncertain[0, 0].bool().cpu()
+        in_height, in_width = uncertain.shape
+
+        window = config.input_size
+        context = window // TILE_CONTEXT_DIVISOR
+        step = window - 2 * context
+        tiles = []
+        total = 0
+        for top in range(0, height, step):
+            bottom = min(top + step, height)
+            # 안쪽 영역 -> coarse 좌표 (바깥쪽으로 올림)
+            rows = uncertain[top * in_height // height:-(-bottom * in_height // height)]
+            for left in range(0, width, step):
+                right = min(left + step, width)
+                total += 1
+                if not rows[:, left * in_width // width:-(-right * in_width // width)].any():
+                    continue
+                # 창은 안쪽 영역 둘레에 문맥을 붙이고, 이미지 밖으로 나가면 안쪽으로 민다
+                window_left = max(0, min(left - context, width - window))
+                window_top = max(0, min(top - context, height - window))
+                tiles.append((
+                    (window_left, window_top, min(window_left + window, width), min(window_top + window, height)),
+                    (left, top, right, bottom),
+                ))
+        EDGE_TILES.inc(len(tiles), result="refined")
+        EDGE_TILES.inc(total - len(tiles), result="skipped")
+        return tiles
+
+    def process_coarse_to_fine(self, image: Image.Image) -> Image.Image:
+        """
+        coarse-to-fine 배경 제거
+
+        coarse_size 로 전체를 추론해 알파를 만든 뒤, edge_tiles() 가 고른 타일만 원본
+        해상도 그대로 input_size 로 다시 추론해 안쪽 영역의 알파를 덮어쓴다.
+        확실한 전경/배경은 저해상도 결과를 쓰므로 고해상도 추론은 경계를 지나는 타일에만 든다.
+        """
+        config = self.config
+        threshold = self._mask_threshold()
+        coarse = self.infer(image, config.coarse_size)
+        buffer = self._compose(image, coarse)
+        try:
+            with stage("edge_band"):
+                tiles = self.edge_tiles(coarse, image.size)
+            alpha = buffer[..., 3]
+            for window, (left, top, right, bottom) in tiles:
+                crop = image.crop(window)
+                probs = self.refine_mask(self.infer(crop)[:1], crop)
+                with stage("mask_resize"):
+                    tile_alpha = upsample_alpha(probs[:1], crop.size, config.mask_resample, threshold)
+                    x, y = left - window[0], top - window[1]
+                    alpha[top:bottom, left:right] = tile_alpha[0, y:y + bottom - top, x:x + right - left]
+        except Exception:
+            buffer_pool.release(buffer)
+            raise
+        return self._wrap_rgba(image.size, buffer)
+
+    @staticmethod
+    def copy_rgbx(image: Image.Image, buffer: np.ndarray):
+        """
+        RGB 이미지를 (H, W, 4) uint8 버퍼에 RGBX 로 복사 (네 번째 바이트는 호출한 쪽이 덮어씀)
+
+        convert("RGBA") 처럼 전체 크기 이미지를 새로 만들지 않도록 행 묶음 단위로,
+        픽셀당 4바이트를 uint32 하나로 연속 복사한다.
+        """
+        width, height = image.size
+        pixels = buffer.reshape(height, width * 4).view(np.uint32)
+        for top in range(0, height, COPY_STRIP_ROWS):
+            bottom = min(top + COPY_STRIP_ROWS, height)
+            strip = image.crop((0, top, width, bottom)).tobytes("raw", "RGBX")
+            pixels[top:bottom] = np.frombuffer(strip, dtype=np.uint32).reshape(bottom - top, width)
+
+    def _lease(self, owner, buffer: np.ndarray):
+        key = id(owner)
+        with self._leases_lock:
+            self._leases[key] = buffer
+        # release() 없이 owner 가 사라지면 버퍼도 GC 에 맡긴다
+        weakref.finalize(owner, self._drop_lease, key)
+
+    def _drop_lease(self, key: int) -> Optional[np.ndarray]:
+        with self._leases_lock:
+            return self._leases.pop(key, None)
+
+    def release(self, owner):
+        """
+        postprocess()/fallback() 결과 이미지나 preprocess() 텐서가 쓰던 버퍼를 풀에 반납
+
+        반납 후에는 owner 를 더 이상 쓰면 안 된다. 풀 버퍼가 아닌 객체는 무시한다.
+        """
+        buffer = self._drop_lease(id(owner))
+        if buffer is not None:
+            buffer_pool.release(buffer)
+
+    def process(self, image: Image.Image) -> Image.Image:
+        """
+        모델을 사용해 배경 제거
+
+        Args:
+            image: RGB PIL Image
+
+        Returns:
+            배경이 제거된 RGBA PIL Image (추론 실패 시 원본 RGBA)
+        """
+        if self.model is None:
+            logger.warning("Model not loaded, returning original image with alpha channel")
+            return image.convert("RGBA")
+        try:
+            config = self.config
+            if config.coarse_to_fine and max(image.size) > config.input_size:
+                return self.process_coarse_to_fine(image)
+            return self.postprocess(image, self.infer(image))
+        except Exception as e:
+            logger.error(f"Error processing image: {e}")
+            # 에러 발생 시 원본 이미지를 RGBA로 변환하여 반환
+            return image.convert("RGBA")
+
+    def fallback(self, image: Image.Image) -> Image.Image:
+        """
+        간단한 배경 제거 (폴백 메서드)
+
+        모델이 로드되지 않았을 때 사용. 흰색에 가까운 픽셀을 투명하게 만든다.
+        """
+        width, height = image.size
+        buffer = buffer_pool.acquire((height, width, 4))
+        self.copy_rgbx(image, buffer)
+        threshold = self.config.fallback_threshold
+        background = (buffer[..., :3] > threshold).all(axis=2)
+        alpha = buffer[..., 3]
+        alpha.fill(255)
+        alpha[background] = 0
+        return self._wrap_rgba(image.size, buffer)
+
+    def remove_background(self, image: Image.Image) -> Image.Image:
+        """모델이 있으면 모델, 없으면 폴백 메서드로 배경 제거"""
+        if self.model is not None:
+            return self.process(image)
+        # 모델이 없으면 간단한 폴백 메서드 사용
+        with stage("fallback"):
+            return self.fallback(image)
+
+    def remove_background_batch(self, images: Sequence[Image.Image]) -> List[Image.Image]:
+        """
+        여러 이미지를 모델 forward 한 번으로 배경 제거 (오프라인 일괄 처리용)
+
+        이미지마다 preprocess() 한 입력을 (B, 3, S, S) 로 이어 붙여 추론하고, 확률 마스크를
+        이미지별로 postprocess() 한다. 한 장씩 remove_background() 한 것과 같은 단계/설정을
+        쓴다. 모델이 없거나, predict() 모델이거나, coarse-to-fine 대상 이미지가 있거나,
+        배치 추론이 실패하면 한 장씩 처리한다.
+        """
+        model = self.model
+        config = self.config
+        if (
+            model is None or len(images) < 2 or hasattr(model, "predict")
+            or (config.coarse_to_fine and any(max(image.size) > config.input_size for image in images))
+        ):
+            return [self.remove_background(image) for image in images]
+        tensors = [self.preprocess(image) for image in images]
+        try:
+            probs = self.forward(torch.cat(tensors), images[0])
+        except Exception as e:
+            logger.error(f"Batch inference failed, processing one by one: {e}")
+            return [self.remove_background(image) for image in images]
+        finally:
+            for tensor in tensors:
+                self.release(tensor)
+        return [self.postprocess(image, probs[i:i + 1]) for i, image in enumerate(images)]
+
+    def encode_png(self, image: Image.Image, quality: int = 95) -> bytes:
+        """결과 이미지를 PNG 바이트로 인코딩"""
+        with stage("encode"):
+            output = io.BytesIO()
+            image.save(output, format="PNG", quality=quality, optimize=True)
+            return output.getvalue()
+
+    def encode_jpeg(self, image: Image.Image, quality: int = JPEG_QUALITY) -> bytes:
+        """배경을 합성한 RGB 결과를 JPEG 바이트로 인코딩"""
+        with stage("encode"):
+            output = io.BytesIO()
+            image.save(output, format="JPEG", quality=quality, optimize=True)
+            return output.getvalue()
+
+    def remove_background_png(self, image: Image.Image, quality: int = 95) -> bytes:
+        """배경 제거 + PNG 인코딩, 인코딩이 끝나면 결과 버퍼를 바로 풀에 반납"""
+        result = self.remove_background(image)
+        try:
+            return self.encode_png(result, quality=quality)
+        finally:
+            self.release(result)
@@ -0,0 +1,244 @@
+"""
+비동기 작업(Job) 저장소
+
+POST /jobs 로 등록된 배경 제거 작업을 프로세스 내부 스레드 풀에서 실행하고
+상태/결과를 보관한다. 완료된 작업은 TTL 이 지나면 자동으로 제거된다.
+
+각 작업은 단계별 이벤트(queued, decoded, inference_started ...)를
+타임스탬프와 함께 기록하며, GET /jobs/{id}/events 로 스트리밍된다.
+"""
+
+import asyncio
+import threading
+import time
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 작업 상태 (Replicate 예측 상태와 동일한 이름 사용)
+STATUS_QUEUED = "starting"
+STATUS_PROCESSING = "processing"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_FAILED = "failed"
+
+FINISHED_STATUSES = (STATUS_SUCCEEDED, STATUS_FAILED)
+
+
+class Job:
+    """배경 제거 작업 하나의 상태와 결과"""
+
+    def __init__(self, filename: Optional[str]):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.status = STATUS_QUEUED
+        self.stage = "queued"
+        self.progress = 0.0
+        self.error: Optional[str] = None
+        self.result: Optional[bytes] = None
+        self.media_type: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.queue_position: Optional[int] = None
+        self.events: List[dict] = []
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def emit(self, event: str, progress: Optional[float] = None, **data):
+        """
+        단계 이벤트 기록
+
+        Args:
+            event: 이벤트 이름 (queued, decoded, inference_started ...)
+            progress: 진행률 (0-1), 주어지면 작업 진행률도 갱신
+            **data: 이벤트에 함께 기록할 값 (예: position)
+        """
+        now = time.time()
+        self.stage = event
+        if progress is not None:
+            self.progress = max(self.progress, min(progress, 1.0))
+        # list.append 는 원자적이므로 스트리밍 쪽은 인덱스로만 읽는다
+        self.events.append({
+            "event": event,
+            "time": now,
+            "elapsed_ms": round((now - self.created_at) * 1000, 1),
+            "progress": round(self.progress, 3),
+            **data,
+        })
+
+    def to_dict(self) -> dict:
+        """상태 조회 응답용 딕셔너리"""
+        return {
+            "id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": round(self.progress, 3),
+            "queue_position": self.queue_position,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "urls": {
+                "get": f"/jobs/{self.id}",
+                "result": f"/jobs/{self.id}/result",
+            },
+        }
+
+
+class JobStore:
+    """
+    프로세스 내부 작업 저장소
+
+    Args:
+        ttl_seconds: 완료된 작업을 보관하는 시간 (초)
+        max_workers: 동시에 실행할 작업 수 (모델이 하나이므로 기본 1)
+        max_pending: 대기/실행 중인 작업의 최대 개수
+        max_finished: 보관할 완료 작업의 최대 개수 (넘으면 TTL 전이라도 오래된 것부터 제거)
+    """
+
+    def __init__(self, ttl_seconds: float = 600, max_workers: int = 1, max_pending: int = 100,
+                 max_finished: int = 200):
+        self.ttl_seconds = ttl_seconds
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="cleancut-job"
+        )
+
+    def submit(self, fn: Callable[[Job], Tuple[bytes, str]], filename: Optional[str] = None) -> Job:
+        """
+        작업 등록
+
+        Args:
+            fn: Job 을 받아 (결과 바이트, media type) 을 반환하는 함수
+            filename: 업로드된 파일 이름
+
+        Returns:
+            등록된 Job
+
+        Raises:
+            RuntimeError: 대기 중인 작업이 너무 많은 경우
+        """
+        self.evict_expired()
+        job = Job(filename)
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if not j.finished)
+            if pending >= self.max_pending:
+                raise RuntimeError("Too many pending jobs")
+            self._jobs[job.id] = job
+            job.queue_position = self._queued_ahead(job)
+        job.emit("queued", position=job.queue_position)
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """작업 조회 (만료된 작업은 None)"""
+        self.evict_expired()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def queue_depth(self) -> int:
+        """워커를 기다리는 작업 수"""
+        with self._lock:
+            return sum(1 for j in self._jobs.values() if j.status == STATUS_QUEUED)
+
+    def evict_expired(self) -> int:
+        """TTL 이 지났거나 max_finished 를 넘는 (오래된) 완료 작업 제거, 제거된 개수 반환"""
+        now = time.time()
+        with self._lock:
+            # status 보다 finished_at 을 먼저 기록하므로 완료 작업은 finished_at 이 있다
+            finished = sorted(
+                ((job.finished_at, job_id) for job_id, job in self._jobs.items() if job.finished),
+                reverse=True,
+            )
+            expired = [
+                job_id for rank, (finished_at, job_id) in enumerate(finished)
+                if rank >= self.max_finished or now - finished_at > self.ttl_seconds
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+        if expired:
+            logger.debug(f"Evicted {len(expired)} expired jobs")
+        return len(expired)
+
+    def _queued_ahead(self, job: Job) -> int:
+        """job 보다 먼저 대기 중인 작업 수 (lock 을 잡은 상태에서 호출)"""
+        ahead = 0
+        for other in self._jobs.values():
+            if other is job:
+                break
+            if other.status == STATUS_QUEUED:
+                ahead += 1
+        return ahead
+
+    def _advance_queue(self):
+        """대기열이 줄어들면 남은 작업들의 순번 이벤트 갱신"""
+        with self._lock:
+            queued = [j for j in self._jobs.values() if j.status == STATUS_QUEUED]
+        for position, job in enumerate(queued):
+            if job.queue_position != position:
+                job.queue_position = position
+                job.emit("queued", position=position)
+
+    def shutdown(self):
+        """실행 중인 작업을 기다리지 않고 스레드 풀 종료"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job: Job, fn: Callable[[Job], Tuple[bytes, str]]):
+        job.status = STATUS_PROCESSING
+        job.started_at = time.time()
+        job.queue_position = None
+        self._advance_queue()
+        job.emit("started")
+        try:
+            result, media_type = fn(job)
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}")
+            job.error = str(e)
+            job.finished_at = time.time()
+            job.status = STATUS_FAILED
+            job.emit(STATUS_FAILED, error=job.error)
+            return
+
+        job.result = result
+        job.media_type = media_type
+        # finished_at 을 먼저 기록해야 evict_expired 와 경합하지 않는다
+        job.finished_at = time.time()
+        job.status = STATUS_SUCCEEDED
+        job.emit(STATUS_SUCCEEDED, 1.0, size=len(result))
+
+
+async def iter_events(job: Job, start: int = 0, poll_interval: float = 0.05) -> AsyncIterator[Tuple[int, dict]]:
+    """
+    작업 이벤트를 발생 순서대로 (인덱스, 이벤트) 로 내보내는 비동기 제너레이터
+
+    작업이 succeeded/failed 이벤트를 남기면 종료한다.
+
+    Args:
+        job: 대상 작업
+        start: 이 인덱스부터 전송 (Last-Event-ID 재연결용)
+        poll_interval: 새 이벤트 확인 주기 (초)
+    """
+    index = start
+    while True:
+        while index < len(job.events):
+            event = job.events[index]
+            yield index, event
+            index += 1
+            if event["event"] in FINISHED_STATUSES:
+                return
+        # 종료 이벤트 이후로 재연결하면 보낼 이벤트가 더 없다
+        # (status 는 종료 이벤트보다 먼저 바뀌므로 마지막 이벤트까지 확인)
+        events = job.events
+        if job.finished and index >= len(events) and events and events[-1]["event"] in FINISHED_STATUSES:
+            return
+        await asyncio.sleep(poll_interval)
@@ -0,0 +1,357 @@
+"""
+프로세스 내부 메트릭 (Prometheus 텍스트 포맷)
+
+prometheus_client 의존성 없이 카운터/게이지/히스토그램을 제공한다.
+각 메트릭은 자체 lock 하나만 사용하므로 요청 경로에서의 오버헤드가 작다.
+GET /metrics 는 render() 결과를 그대로 반환한다.
+
+track_stages() 블록 안에서 실행된 stage() 들은 요청 단위로도 기록되어
+Server-Timing 헤더와 구조화 액세스 로그에 사용된다.
+untracked() 블록 안의 작업 (예: 모델 워밍업) 은 요청 지연 메트릭에 기록하지 않는다.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 지연 시간 히스토그램 기본 버킷 (초)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# 배치 크기 히스토그램 버킷
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in pairs
+    )
+    return "{" + body + "}"
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """단조 증가 카운터"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(_Metric):
+    """
+    현재 값 게이지
+
+    func 를 주면 render 시점에 호출해 값을 읽는다 (라벨 없는 게이지 전용).
+    """
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 func: Optional[Callable[[], float]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._func = func
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self) -> List[str]:
+        if self._func is not None:
+            return [f"{self.name} {_format_value(self._func())}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    """누적 버킷 히스토그램"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # key -> [버킷별 개수..., 합계]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [0] * len(self.buckets) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data[i] += 1
+                    break
+            data[-1] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """with 블록 실행 시간을 관측"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(data)) for key, data in self._values.items())
+        lines = []
+        for key, data in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, data):
+                cumulative += count
+                le = ("le", _format_value(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(data[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """메트릭 모음"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(m.render() for m in metrics) + "\n"
+
+
+def process_rss_bytes() -> float:
+    """현재 프로세스의 RSS (바이트)"""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return float(resident_pages * os.sysconf("SC_PAGE_SIZE"))
+    except (OSError, ValueError, IndexError):
+        # /proc 이 없는 환경 (macOS 등) 에서는 최대 RSS 로 대체
+        import resource
+        import sys
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return float(rss if sys.platform == "darwin" else rss * 1024)
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.register(Counter(
+    "cleancut_requests_total",
+    "HTTP requests by endpoint and status code",
+    ("endpoint", "method", "status"),
+))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "cleancut_request_duration_seconds",
+    "HTTP request latency by endpoint",
+    ("endpoint",),
+))
+IN_FLIGHT = REGISTRY.register(Gauge(
+    "cleancut_requests_in_flight",
+    "HTTP requests currently being handled",
+))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "cleancut_stage_duration_seconds",
+    "Pipeline stage latency (read, decode, exif_transpose, resize, preprocess, "
+    "forward, mask_refine, mask_resize, compose, edge_band, crop, background, encode, outline)",
+    ("stage",),
+))
+BATCH_SIZE = REGISTRY.register(Histogram(
+    "cleancut_inference_batch_size",
+    "Number of images per model forward pass",
+    buckets=BATCH_BUCKETS,
+))
+PROCESS_RSS = REGISTRY.register(Gauge(
+    "cleancut_process_resident_memory_bytes",
+    "Resident memory size of the server process",
+    func=process_rss_bytes,
+))
+
+
+# Server-Timing 에 노출하는 단계 묶음 (세부 단계 -> 그룹)
+STAGE_GROUPS = {
+    "read": "decode",
+    "decode": "decode",
+    "exif_transpose": "decode",
+    "resize": "decode",
+    "preprocess": "preprocess",
+    "forward": "inference",
+    "fallback": "inference",
+    "mask_refine": "postprocess",
+    "mask_resize": "postprocess",
+    "compose": "postprocess",
+    "edge_band": "postprocess",
+    "crop": "postprocess",
+    "background": "postprocess",
+    "encode": "encode",
+    "outline": "encode",
+}
+
+
+class StageTimings:
+    """요청 하나의 단계별 소요 시간 (초)"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def grouped(self) -> Dict[str, float]:
+        """STAGE_GROUPS 기준으로 합산한 단계별 시간"""
+        groups: Dict[str, float] = {}
+        for name, seconds in self.stages.items():
+            group = STAGE_GROUPS.get(name, name)
+            groups[group] = groups.get(group, 0.0) + seconds
+        return groups
+
+    def server_timing(self) -> str:
+        """Server-Timing 헤더 값 (밀리초)"""
+        parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.grouped().items()]
+        parts.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(parts)
+
+    def as_millis(self) -> Dict[str, float]:
+        """로그용 단계별 시간 (밀리초)"""
+        return {name: round(seconds * 1000, 2) for name, seconds in self.stages.items()}
+
+
+_current_timings: ContextVar[Optional[StageTimings]] = ContextVar("cleancut_stage_timings", default=None)
+_untracked: ContextVar[bool] = ContextVar("cleancut_untracked", default=False)
+
+
+@contextmanager
+def track_stages() -> Iterator[StageTimings]:
+    """블록 안에서 실행된 stage() 시간을 StageTimings 로 수집"""
+    timings = StageTimings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+@contextmanager
+def untracked() -> Iterator[None]:
+    """블록 안의 stage() 와 배치 크기를 메트릭에 기록하지 않음 (요청이 아닌 내부 작업용)"""
+    token = _untracked.set(True)
+    try:
+        yield
+    finally:
+        _untracked.reset(token)
+
+
+def is_tracked() -> bool:
+    """지금 실행 중인 작업을 메트릭에 기록해야 하는지"""
+    return not _untracked.get()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    파이프라인 단계 실행 시간을 cleancut_stage_duration_seconds 에 기록
+
+    track_stages() 안이라면 요청 단위 StageTimings 에도 기록한다.
+    untracked() 안에서는 아무것도 기록하지 않는다.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        if is_tracked():
+            STAGE_SECONDS.observe(seconds, stage=name)
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.add(name, seconds)
@@ -0,0 +1,252 @@
+"""
+모델 레지스트리
+
+프로세스 하나에서 여러 세그멘테이션 모델(예: BiRefNet, BiRefNet_HR)을 함께 서비스한다.
+모델은 처음 요청될 때 로드하고, 로드된 모델의 파라미터/버퍼 메모리 합계가 예산을
+넘으면 사용 중이 아닌 모델부터 가장 오래 쓰지 않은 순서(LRU)로 내린다.
+사용 중인 모델은 내리지 않으므로 요청이 도중에 모델을 잃지 않는다.
+
+모델 이름은 Hugging Face 모델 ID (또는 로컬 경로), 뒤에 "@리비전" 을 붙이면 그 리비전을
+로드한다 (예: ZhengPeng7/BiRefNet@main). 같은 모델의 새 버전은 다른 이름으로 취급한다.
+
+사용법:
+    with model_registry.use("ZhengPeng7/BiRefNet") as loaded:
+        if loaded is not None:
+            loaded.model(...)
+
+환경 변수:
+CLEANCUT_MODEL_MEMORY_MB: 로드해 둘 모델 메모리 예산 (기본값 0, 0 이면 제한 없음)
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+import torch
+
+from cleancut.metrics import REGISTRY, Counter, Gauge
+from cleancut.stub_model import StubSegmentationModel
+
+logger = logging.getLogger(__name__)
+
+
+def load_model(model_name: str) -> Tuple[torch.nn.Module, torch.device]:
+    """
+    모델 로드 (eval 모드, 사용 가능한 장치로 이동)
+
+    Args:
+        model_name: Hugging Face 모델 ID 또는 로컬 경로 ("@리비전" 가능), 또는 "stub" (cleancut.stub_model)
+    """
+    # GPU 사용 가능 여부 확인
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    logger.info(f"Using device: {device}")
+    logger.info(f"Loading model: {model_name}")
+
+    repo, _, revision = model_name.partition("@")
+    # stub 이면 가중치 없는 대체 모델 사용 (부하 테스트/벤치마크용)
+    if repo == "stub":
+        model = StubSegmentationModel.from_env()
+    else:
+        # Hugging Face에서 BiRefNet 모델 로드
+        from transformers import AutoModelForImageSegmentation
+
+        model = AutoModelForImageSegmentation.from_pretrained(
+            repo,
+            revision=revision or None,
+            trust_remote_code=True
+        )
+    model = model.to(device)
+    model.eval()
+    return model, device
+
+
+def model_bytes(model: torch.nn.Module) -> int:
+    """파라미터와 버퍼가 차지하는 바이트 (활성화 메모리 제외)"""
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+
+class LoadedModel:
+    """레지스트리에 로드된 모델 하나"""
+
+    def __init__(self, name: str, model: torch.nn.Module, device: torch.device):
+        self.name = name
+        self.model = model
+        self.device = device
+        self.nbytes = model_bytes(model)
+        # 이 모델을 쓰고 있는 use() 블록 수
+        self.refs = 0
+
+
+class ModelRegistry:
+    """
+    model_name -> 로드된 모델
+
+    Args:
+        max_bytes: 로드해 둘 모델 메모리 예산 (0 이면 제한 없음)
+        loader: model_name -> (모델, 장치)
+    """
+
+    def __init__(self, max_bytes: int = 0,
+                 loader: Callable[[str], Tuple[torch.nn.Module, torch.device]] = load_model):
+        self.max_bytes = max_bytes
+        self.loader = loader
+        # 오래 쓰지 않은 것부터
+        self._models: "OrderedDict[str, LoadedModel]" = OrderedDict()
+        self._loaded_bytes = 0
+        # 한 번 로드했던 모델의 크기 (다시 로드하기 전에 자리를 비우는 데 사용)
+        self._known_bytes: Dict[str, int] = {}
+        # 로드에 실패한 모델 (다시 시도하지 않고 폴백으로 동작)
+        self._failed: Set[str] = set()
+        # 사용 수가 줄면 unload() 에 알린다
+        self._lock = threading.Condition()
+        # 로드는 한 번에 하나씩 (동시에 두 모델을 올려 예산을 넘지 않도록)
+        self._load_lock = threading.Lock()
+        # 모델을 내릴 때 호출 (model_name 인자, self._lock 보유 상태)
+        self.evict_listeners: List[Callable[[str], None]] = []
+
+    @property
+    def loaded_bytes(self) -> int:
+        return self._loaded_bytes
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        """로드된 모델 이름 (오래 쓰지 않은 것부터)"""
+        return tuple(self._models)
+
+    def is_loaded(self, model_name: str) -> bool:
+        return model_name in self._models
+
+    @contextmanager
+    def use(self, model_name: str, retry: bool = False) -> Iterator[Optional[LoadedModel]]:
+        """
+        블록 실행 동안 모델을 로드된 상태로 유지 (필요하면 로드)
+
+        로드에 실패한 모델이면 None 을 준다 (retry 면 전에 실패했어도 다시 로드).
+        """
+        if retry:
+            self._failed.discard(model_name)
+        loaded = self._acquire(model_name)
+        try:
+            yield loaded
+        finally:
+            if loaded is not None:
+                with self._lock:
+                    loaded.refs -= 1
+                    self._evict()
+                    self._lock.notify_all()
+
+    def unload(self, model_name: str, timeout: Optional[float] = None) -> bool:
+        """
+        모델을 쓰는 요청이 모두 끝나길 기다린 뒤 내림
+
+        Returns:
+            내렸거나 로드되어 있지 않으면 True, timeout 안에 요청이 끝나지 않으면 False
+        """
+        with self._lock:
+            drained = self._lock.wait_for(
+                lambda: model_name not in self._models or not self._models[model_name].refs,
+                timeout=timeout,
+            )
+            if not drained:
+                return False
+            loaded = self._models.get(model_name)
+            if loaded is not None:
+                self._remove(loaded)
+                logger.info(f"Model unloaded: {model_name} ({loaded.nbytes // 2**20}MB)")
+        return True
+
+    def adopt(self, model_name: str, model: torch.nn.Module, device: torch.device):
+        """레지스트리 밖에서 로드된 모델 등록 (Engine.load() 로 미리 로드한 경우)"""
+        with self._lock:
+            if model_name not in self._models:
+                self._add(LoadedModel(model_name, model, device))
+
+    def _acquire(self, model_name: str) -> Optional[LoadedModel]:
+        loaded = self._hit(model_name)
+        if loaded is not None:
+            return loaded
+        with self._load_lock:
+            # 기다리는 동안 다른 요청이 로드했을 수 있다
+            loaded = self._hit(model_name)
+            if loaded is not None or model_name in self._failed:
+                return loaded
+            with self._lock:
+                self._evict(reserve=self._known_bytes.get(model_name, 0))
+            try:
+                model, device = self.loader(model_name)
+            except Exception as e:
+                logger.error(f"Failed to load model {model_name}: {e}")
+                self._failed.add(model_name)
+                return None
+            loaded = LoadedModel(model_name, model, device)
+            loaded.refs = 1
+            with self._lock:
+                self._add(loaded)
+                self._evict()
+            MODEL_LOADS.inc()
+            logger.info(f"Model loaded: {model_name} ({loaded.nbytes // 2**20}MB)")
+            return loaded
+
+    def _hit(self, model_name: str) -> Optional[LoadedModel]:
+        with self._lock:
+            loaded = self._models.get(model_name)
+            if loaded is not None:
+                loaded.refs += 1
+                self._models.move_to_end(model_name)
+            return loaded
+
+    def _add(self, loaded: LoadedModel):
+        """self._lock 보유 상태에서 호출"""
+        self._models[loaded.name] = loaded
+        self._loaded_bytes += loaded.nbytes
+        self._known_bytes[loaded.name] = loaded.nbytes
+
+    def _evict(self, reserve: int = 0):
+        """예산을 넘는 동안 사용 중이 아닌 모델을 LRU 순으로 내림 (self._lock 보유 상태에서 호출)"""
+        if not self.max_bytes:
+            return
+        for name in list(self._models):
+            if self._loaded_bytes + reserve <= self.max_bytes:
+                break
+            loaded = self._models[name]
+            if loaded.refs:
+                continue
+            self._remove(loaded)
+            MODEL_EVICTIONS.inc()
+            logger.info(f"Model evicted: {name} ({loaded.nbytes // 2**20}MB)")
+
+    def _remove(self, loaded: LoadedModel):
+        """self._lock 보유 상태에서 호출"""
+        del self._models[loaded.name]
+        self._loaded_bytes -= loaded.nbytes
+        for listener in self.evict_listeners:
+            listener(loaded.name)
+        loaded.model = None
+        if loaded.device.type == "cuda":
+            torch.cuda.empty_cache()
+
+
+model_registry = ModelRegistry(int(float(os.getenv("CLEANCUT_MODEL_MEMORY_MB", "0")) * 2**20))
+
+REGISTRY.register(Gauge(
+    "cleancut_models_loaded",
+    "Segmentation models currently loaded in the model registry",
+    func=lambda: len(model_registry.names),
+))
+REGISTRY.register(Gauge(
+    "cleancut_model_memory_bytes",
+    "Parameter and buffer bytes of the loaded models",
+    func=lambda: model_registry.loaded_bytes,
+))
+MODEL_LOADS = REGISTRY.register(Counter(
+    "cleancut_model_loads_total",
+    "Models loaded by the model registry",
+))
+MODEL_EVICTIONS = REGISTRY.register(Counter(
+    "cleancut_model_evictions_total",
+    "Models unloaded by the model registry to stay within the memory budget",
+))
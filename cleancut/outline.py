@@ -0,0 +1,194 @@
+"""
+피사체 외곽선(벡터) 추출
+
+배경 제거 결과의 알파 평면을 threshold 로 이진화한 뒤 픽셀 경계 선분을 numpy 로
+한 번에 찾고, 선분을 이어 닫힌 윤곽선을 만든 다음 Ramer-Douglas-Peucker 로
+단순화한다. 스티커/인쇄용 칼선처럼 픽셀이 아니라 윤곽이 필요할 때 PNG 대신
+SVG path 나 JSON 다각형으로 돌려준다.
+
+좌표는 픽셀 모서리 기준 (0..width, 0..height). 윤곽선은 피사체가 진행 방향의
+오른쪽에 오도록 돌고, 구멍은 반대 방향으로 돈다 (SVG 는 evenodd 로 채움).
+대각선으로만 닿은 픽셀은 서로 다른 윤곽선으로 나뉜다 (4-연결).
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+from PIL import Image
+
+# 알파가 이 값 이상이면 피사체 (확률 0.5)
+OUTLINE_THRESHOLD = 128
+# RDP 허용 오차 (픽셀)
+OUTLINE_TOLERANCE = 1.5
+# 이보다 넓이가 작은 윤곽선(잡티, 작은 구멍)은 버린다 (픽셀^2)
+MIN_CONTOUR_AREA = 16.0
+
+
+def boundary_edges(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    이진 마스크의 경계 선분 (피사체가 진행 방향 오른쪽)
+
+    Returns:
+        (시작점, 끝점), 각각 (E, 2) int64 (x, y)
+    """
+    padded = np.pad(mask.astype(np.int8), 1)
+    # 가로 경계: 격자 행 y 에서 위(y-1)/아래(y) 픽셀이 다른 곳
+    vertical_change = padded[1:, 1:-1] - padded[:-1, 1:-1]
+    # 세로 경계: 격자 열 x 에서 왼쪽(x-1)/오른쪽(x) 픽셀이 다른 곳
+    horizontal_change = padded[1:-1, 1:] - padded[1:-1, :-1]
+
+    starts, ends = [], []
+    # 피사체 위쪽 경계: (x, y) -> (x + 1, y)
+    y, x = np.nonzero(vertical_change == 1)
+    starts.append(np.stack([x, y], axis=1))
+    ends.append(np.stack([x + 1, y], axis=1))
+    # 아래쪽 경계: (x + 1, y) -> (x, y)
+    y, x = np.nonzero(vertical_change == -1)
+    starts.append(np.stack([x + 1, y], axis=1))
+    ends.append(np.stack([x, y], axis=1))
+    # 왼쪽 경계: (x, y + 1) -> (x, y)
+    y, x = np.nonzero(horizontal_change == 1)
+    starts.append(np.stack([x, y + 1], axis=1))
+    ends.append(np.stack([x, y], axis=1))
+    # 오른쪽 경계: (x, y) -> (x, y + 1)
+    y, x = np.nonzero(horizontal_change == -1)
+    starts.append(np.stack([x, y], axis=1))
+    ends.append(np.stack([x, y + 1], axis=1))
+    return np.concatenate(starts).astype(np.int64), np.concatenate(ends).astype(np.int64)
+
+
+def trace_contours(mask: np.ndarray) -> List[np.ndarray]:
+    """
+    이진 마스크의 닫힌 윤곽선 목록
+
+    경계 선분마다 다음 선분(끝점에서 시작하는 선분)을 정렬/검색으로 한 번에 구한다.
+    두 선분이 시작하는 꼭짓점(대각선으로만 닿은 픽셀)에서는 오른쪽으로 꺾는 선분을 고른다.
+
+    Returns:
+        (N, 2) int64 꼭짓점 배열 목록 (방향이 바뀌는 꼭짓점만)
+    """
+    starts, ends = boundary_edges(mask)
+    if len(starts) == 0:
+        return []
+    stride = mask.shape[1] + 1
+    start_ids = starts[:, 1] * stride + starts[:, 0]
+    end_ids = ends[:, 1] * stride + ends[:, 0]
+    order = np.argsort(start_ids, kind="stable")
+    sorted_ids = start_ids[order]
+    first = np.searchsorted(sorted_ids, end_ids, side="left")
+    count = np.searchsorted(sorted_ids, end_ids, side="right") - first
+    following = order[first]
+
+    saddles = np.flatnonzero(count == 2)
+    if saddles.size:
+        directions = ends - starts
+        incoming = directions[saddles]
+        # 화면 좌표(y 아래)에서 오른쪽으로 꺾은 방향
+        right_turn = np.stack([-incoming[:, 1], incoming[:, 0]], axis=1)
+        candidate = order[first[saddles]]
+        matches = (directions[candidate] == right_turn).all(axis=1)
+        following[saddles] = np.where(matches, candidate, order[first[saddles] + 1])
+
+    contours = []
+    visited = np.zeros(len(starts), dtype=bool)
+    for edge in range(len(starts)):
+        if visited[edge]:
+            continue
+        loop = []
+        while not visited[edge]:
+            visited[edge] = True
+            loop.append(edge)
+            edge = following[edge]
+        points = starts[loop]
+        # 방향이 바뀌지 않는 꼭짓점 제거
+        directions = ends[loop] - points
+        turns = (directions != np.roll(directions, 1, axis=0)).any(axis=1)
+        contours.append(points[turns])
+    return contours
+
+
+def polygon_area(points: np.ndarray) -> float:
+    """부호 있는 넓이 (신발끈 공식)"""
+    x, y = points[:, 0].astype(np.float64), points[:, 1].astype(np.float64)
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))
+
+
+def simplify(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    닫힌 다각형 Ramer-Douglas-Peucker 단순화
+
+    첫 꼭짓점에서 시작해 첫 꼭짓점으로 돌아오는 열린 선으로 보고 처리한다.
+    구간마다 모든 꼭짓점의 거리를 한 번에 계산한다.
+    """
+    if len(points) <= 3 or tolerance <= 0:
+        return points
+    path = np.concatenate([points, points[:1]]).astype(np.float64)
+    keep = np.zeros(len(path), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(path) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        segment = path[last] - path[first]
+        offsets = path[first + 1:last] - path[first]
+        length = np.hypot(segment[0], segment[1])
+        if length == 0:
+            # 시작점과 끝점이 같으면 그 점까지의 거리
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            distances = np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / length
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance:
+            middle = first + 1 + index
+            keep[middle] = True
+            stack.append((first, middle))
+            stack.append((middle, last))
+    return path[:-1][keep[:-1]]
+
+
+def extract_outline(image: Image.Image, threshold: int = OUTLINE_THRESHOLD,
+                    tolerance: float = OUTLINE_TOLERANCE,
+                    min_area: float = MIN_CONTOUR_AREA) -> List[np.ndarray]:
+    """
+    RGBA 결과의 피사체 윤곽선 (넓이가 큰 것부터)
+
+    Returns:
+        (N, 2) float64 꼭짓점 배열 목록
+    """
+    mask = np.asarray(image.getchannel("A")) >= threshold
+    contours = []
+    for points in trace_contours(mask):
+        if abs(polygon_area(points)) < min_area:
+            continue
+        contours.append(simplify(points, tolerance))
+    contours.sort(key=lambda points: -abs(polygon_area(points)))
+    return contours
+
+
+def _format_number(value: float) -> str:
+    return f"{value:.1f}".rstrip("0").rstrip(".")
+
+
+def to_svg(contours: List[np.ndarray], size: Tuple[int, int]) -> str:
+    """윤곽선을 path 하나로 담은 SVG 문서"""
+    width, height = size
+    commands = []
+    for points in contours:
+        coordinates = " ".join(f"{_format_number(x)} {_format_number(y)}" for x, y in points)
+        commands.append(f"M{coordinates}Z")
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}">'
+        f'<path fill-rule="evenodd" d="{"".join(commands)}"/></svg>'
+    )
+
+
+def to_json(contours: List[np.ndarray], size: Tuple[int, int]) -> dict:
+    """윤곽선 JSON (polygons: [[[x, y], ...], ...], 구멍은 반대 방향)"""
+    width, height = size
+    return {
+        "width": width,
+        "height": height,
+        "polygons": [[[round(float(x), 1), round(float(y), 1)] for x, y in points] for points in contours],
+    }
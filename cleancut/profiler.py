@@ -0,0 +1,217 @@
+"""
+운영 중 핫패스 분석용 샘플링 프로파일러
+
+관리자 엔드포인트(POST /admin/profile)나 SIGUSR1 신호로 켜면 다음 N개 요청
+또는 T초 동안 모든 스레드의 스택을 주기적으로 샘플링해 flamegraph.pl /
+speedscope 에서 바로 읽을 수 있는 collapsed stack(.folded) 파일로 저장한다.
+torch 옵션을 켜면 모델 forward 구간을 torch.profiler 로 함께 기록해
+chrome trace(.json) 로 저장한다.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SamplingProfiler:
+    """
+    sys._current_frames() 기반 벽시계(wall-clock) 샘플링 프로파일러
+
+    Args:
+        interval: 샘플링 주기 (초)
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cleancut-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                self.samples[self._collapse(names.get(ident, str(ident)), frame)] += 1
+            self.sample_count += 1
+
+    @staticmethod
+    def _collapse(thread_name: str, frame) -> str:
+        stack: List[str] = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        stack.append(thread_name)
+        # collapsed 포맷은 ';' 를 구분자로 사용
+        return ";".join(part.replace(";", ":") for part in reversed(stack))
+
+    def write_folded(self, path: str):
+        """collapsed stack 포맷으로 저장 (한 줄에 '스택 샘플수')"""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class ProfileSession:
+    """
+    요청 수 또는 시간 제한이 있는 프로파일링 세션 관리자
+
+    한 번에 하나의 세션만 실행되며, 제한에 도달하면 자동으로 종료하고
+    결과 파일을 output_dir 에 남긴다.
+
+    Args:
+        output_dir: 결과 파일 저장 디렉토리
+    """
+
+    def __init__(self, output_dir: str = "profiles"):
+        self.output_dir = output_dir
+        self._lock = threading.Lock()
+        self._profiler: Optional[SamplingProfiler] = None
+        self._timer: Optional[threading.Timer] = None
+        self._remaining: Optional[int] = None
+        self._torch = False
+        self._forward_count = 0
+        # torch.profiler 는 동시에 하나만 열 수 있다 (겹치는 forward 는 기록하지 않음)
+        self._torch_active = False
+        self._name: Optional[str] = None
+        self._started_at: Optional[float] = None
+        self.last_outputs: List[str] = []
+
+    @property
+    def active(self) -> bool:
+        return self._profiler is not None
+
+    def start(self, requests: Optional[int] = None, seconds: Optional[float] = None,
+              torch_profile: bool = False, interval: float = 0.005) -> dict:
+        """
+        세션 시작
+
+        Args:
+            requests: 이 개수의 요청이 끝나면 종료 (None 이면 제한 없음)
+            seconds: 이 시간이 지나면 종료 (None 이면 제한 없음)
+            torch_profile: 모델 forward 를 torch.profiler 로도 기록할지 여부
+            interval: 샘플링 주기 (초)
+
+        Raises:
+            RuntimeError: 이미 실행 중인 세션이 있거나 종료 조건이 없는 경우
+        """
+        if requests is None and seconds is None:
+            raise RuntimeError("Either requests or seconds must be given")
+        with self._lock:
+            if self._profiler is not None:
+                raise RuntimeError("Profiling session already running")
+            os.makedirs(self.output_dir, exist_ok=True)
+            self._name = time.strftime("profile-%Y%m%d-%H%M%S")
+            self._remaining = requests
+            self._torch = torch_profile
+            self._forward_count = 0
+            self._started_at = time.time()
+            self.last_outputs = []
+            self._profiler = SamplingProfiler(interval)
+            self._profiler.start()
+            if seconds is not None:
+                self._timer = threading.Timer(seconds, self.stop)
+                self._timer.daemon = True
+                self._timer.start()
+        logger.info(f"Profiling started: {self._name} (requests={requests}, seconds={seconds}, torch={torch_profile})")
+        return self.status()
+
+    def stop(self) -> List[str]:
+        """세션 종료 후 결과 파일 경로 목록 반환 (실행 중이 아니면 빈 목록)"""
+        with self._lock:
+            profiler, self._profiler = self._profiler, None
+            if profiler is None:
+                return []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        profiler.stop()
+        path = os.path.join(self.output_dir, f"{self._name}.folded")
+        profiler.write_folded(path)
+        self.last_outputs.insert(0, path)
+        logger.info(f"Profiling finished: {profiler.sample_count} samples written to {path}")
+        return list(self.last_outputs)
+
+    def request_done(self):
+        """요청 하나가 끝날 때 호출, 요청 수 제한에 도달하면 세션 종료"""
+        if self._profiler is None or self._remaining is None:
+            return
+        with self._lock:
+            if self._remaining is None:
+                return
+            self._remaining -= 1
+            done = self._remaining <= 0
+        if done:
+            self.stop()
+
+    @contextmanager
+    def torch_forward(self) -> Iterator[None]:
+        """
+        torch 프로파일링이 켜져 있으면 블록을 torch.profiler 로 기록
+
+        다른 스레드의 forward 를 기록하는 중이면 (작업 워커와 요청이 동시에 추론하는 경우)
+        이 forward 는 기록하지 않고 그대로 실행한다.
+        """
+        if self._profiler is None or not self._torch:
+            yield
+            return
+
+        import torch
+        from torch.profiler import profile, ProfilerActivity
+        activities = [ProfilerActivity.CPU]
+        if torch.cuda.is_available():
+            activities.append(ProfilerActivity.CUDA)
+
+        with self._lock:
+            busy = self._torch_active
+            if not busy:
+                self._torch_active = True
+                self._forward_count += 1
+                path = os.path.join(self.output_dir, f"{self._name}-forward-{self._forward_count}.json")
+        if busy:
+            yield
+            return
+        try:
+            with profile(activities=activities, record_shapes=True, with_stack=True) as prof:
+                yield
+            prof.export_chrome_trace(path)
+            self.last_outputs.append(path)
+        finally:
+            with self._lock:
+                self._torch_active = False
+
+    def status(self) -> dict:
+        return {
+            "active": self.active,
+            "name": self._name,
+            "started_at": self._started_at,
+            "remaining_requests": self._remaining if self.active else None,
+            "torch": self._torch,
+            "outputs": self.last_outputs,
+        }
+
+
+# 프로세스 전역 세션 (엔진의 forward 와 서버 관리자 엔드포인트가 공유)
+profile_session = ProfileSession(os.getenv("CLEANCUT_PROFILE_DIR", "profiles"))
@@ -0,0 +1,86 @@
+"""
+가벼운 대체(stub) 세그멘테이션 모델
+
+BiRefNet 가중치 없이 배치/인코딩/HTTP 경로를 부하 테스트하거나 벤치마크할 때
+CLEANCUT_MODEL=stub 으로 선택한다. BiRefNet 과 같은 인터페이스
+(torch.nn.Module, (B, 3, H, W) 입력 -> 멀티 스케일 logits 리스트)를 가지며,
+같은 입력에는 항상 같은 마스크를 돌려준다.
+
+환경 변수:
+CLEANCUT_STUB_MASK: ellipse (기본값) | box | luma
+CLEANCUT_STUB_LATENCY_MS: forward 한 번의 인위적 지연 (기본값 50)
+CLEANCUT_STUB_LATENCY_MODE: sleep (GPU 대기처럼 GIL 해제, 기본값) | spin (CPU 점유)
+"""
+
+import os
+import time
+
+import torch
+
+MASK_KINDS = ("ellipse", "box", "luma")
+LATENCY_MODES = ("sleep", "spin")
+
+# logits 기울기 (클수록 경계가 날카로움)
+EDGE_SHARPNESS = 40.0
+
+
+class StubSegmentationModel(torch.nn.Module):
+    """
+    합성 마스크를 내는 BiRefNet 대체 모델
+
+    Args:
+        mask: 마스크 모양 (ellipse, box, luma)
+        latency_ms: 이미지 한 장당 forward 지연 (밀리초)
+        latency_mode: sleep 또는 spin
+    """
+
+    def __init__(self, mask: str = "ellipse", latency_ms: float = 50.0, latency_mode: str = "sleep"):
+        super().__init__()
+        if mask not in MASK_KINDS:
+            raise ValueError(f"Unknown stub mask '{mask}', expected one of {MASK_KINDS}")
+        if latency_mode not in LATENCY_MODES:
+            raise ValueError(f"Unknown latency mode '{latency_mode}', expected one of {LATENCY_MODES}")
+        self.mask = mask
+        self.latency_ms = latency_ms
+        self.latency_mode = latency_mode
+        # .to(device) 로 장치를 따라가도록 버퍼 하나를 둔다
+        self.register_buffer("_luma_weights", torch.tensor([0.299, 0.587, 0.114]).view(1, 3, 1, 1))
+
+    @classmethod
+    def from_env(cls) -> "StubSegmentationModel":
+        return cls(
+            mask=os.getenv("CLEANCUT_STUB_MASK", "ellipse"),
+            latency_ms=float(os.getenv("CLEANCUT_STUB_LATENCY_MS", "50")),
+            latency_mode=os.getenv("CLEANCUT_STUB_LATENCY_MODE", "sleep"),
+        )
+
+    def _wait(self, batch_size: int):
+        seconds = self.latency_ms * batch_size / 1000
+        if seconds <= 0:
+            return
+        if self.latency_mode == "sleep":
+            time.sleep(seconds)
+        else:
+            deadline = time.perf_counter() + seconds
+            while time.perf_counter() < deadline:
+                pass
+
+    def forward(self, x: torch.Tensor):
+        batch, _, height, width = x.shape
+        self._wait(batch)
+
+        if self.mask == "luma":
+            # 밝은 배경 위의 어두운 피사체를 전경으로 본다
+            luma = (x * self._luma_weights).sum(dim=1, keepdim=True)
+            logits = (0.8 - luma) * EDGE_SHARPNESS
+        else:
+            ys = torch.linspace(-1.0, 1.0, height, device=x.device).view(1, 1, height, 1)
+            xs = torch.linspace(-1.0, 1.0, width, device=x.device).view(1, 1, 1, width)
+            if self.mask == "ellipse":
+                distance = torch.sqrt((xs / 0.6) ** 2 + (ys / 0.75) ** 2)
+            else:
+                distance = torch.maximum((xs / 0.6).abs(), (ys / 0.75).abs())
+            logits = ((1.0 - distance) * EDGE_SHARPNESS).expand(batch, 1, height, width)
+
+        # BiRefNet 처럼 멀티 스케일 출력 리스트의 마지막이 최종 결과
+        return [logits.contiguous()]
@@ -0,0 +1,293 @@
+"""
+품질 tier (preview / standard / high)
+
+tier 마다 모델과 입력 해상도가 다르다. 에디터 화면의 즉시 미리보기는 preview,
+내보내기는 high (기존 동작: BiRefNet_HR, 1024) 를 쓴다.
+
+preview:  ZhengPeng7/BiRefNet, 512
+standard: ZhengPeng7/BiRefNet, 1024
+high:     기본 설정 모델 (CLEANCUT_MODEL, 기본값 ZhengPeng7/BiRefNet_HR), 1024
+
+모델은 모델 레지스트리(cleancut.models)가 관리한다. 같은 모델을 쓰는 tier 는 모델 객체
+하나를 공유하고, 처음 요청될 때 로드되며, 모델 메모리 예산을 넘으면 오래 쓰지 않은
+모델부터 내려간다. 기본 설정 모델이 stub 이면 모든 tier 가 stub 을 쓴다.
+
+swap() 은 tier 의 모델을 무중단으로 교체한다: 새 모델을 백그라운드에서 로드하고
+워밍업한 뒤 tier 의 Engine 을 한 번에 바꾸고, 이전 Engine 으로 처리 중인 요청이
+모두 끝나면 (다른 tier 가 쓰지 않는) 이전 모델을 내린다.
+
+환경 변수:
+CLEANCUT_QUALITY_TIERS: tier 목록 덮어쓰기, "이름=모델@입력크기" 쉼표 구분
+    (모델을 비우면 기본 설정 모델, 예: preview=ZhengPeng7/BiRefNet@512,high=@1024)
+CLEANCUT_DEFAULT_TIER: 기본 tier (기본값 high)
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import replace
+from typing import Dict, Iterator, Optional
+
+from PIL import Image
+
+from cleancut.engine import Engine, EngineConfig
+from cleancut.metrics import REGISTRY, Counter, untracked
+from cleancut.models import ModelRegistry, model_registry
+
+logger = logging.getLogger(__name__)
+
+QUALITY_TIERS: Dict[str, dict] = {
+    "preview": {"model_name": "ZhengPeng7/BiRefNet", "input_size": 512},
+    "standard": {"model_name": "ZhengPeng7/BiRefNet", "input_size": 1024},
+    "high": {},
+}
+DEFAULT_TIER = "high"
+
+# 교체 전 새 모델로 돌려 보는 횟수 (첫 forward 의 커널 선택/메모리 할당을 미리 치르도록)
+WARMUP_RUNS = 2
+
+# swap() 진행 상태
+SWAP_LOADING = "loading"
+SWAP_WARMING = "warming"
+SWAP_DRAINING = "draining"
+SWAP_SUCCEEDED = "succeeded"
+SWAP_FAILED = "failed"
+SWAP_FINISHED = (SWAP_SUCCEEDED, SWAP_FAILED)
+
+MODEL_SWAPS = REGISTRY.register(Counter(
+    "cleancut_model_swaps_total",
+    "Quality tier model swaps by result",
+    ("result",),
+))
+
+
+def parse_tiers(spec: str) -> Dict[str, dict]:
+    """CLEANCUT_QUALITY_TIERS 값을 tier 이름 -> EngineConfig 덮어쓸 값으로"""
+    tiers = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        name, _, target = item.partition("=")
+        model_name, _, input_size = target.strip().rpartition("@")
+        if not name.strip() or not input_size.isdigit():
+            raise ValueError(f"Invalid quality tier '{item.strip()}', expected name=model@size")
+        overrides = {"input_size": int(input_size)}
+        if model_name:
+            overrides["model_name"] = model_name
+        tiers[name.strip()] = overrides
+    return tiers
+
+
+class TieredEngines:
+    """
+    tier 이름 -> Engine
+
+    Args:
+        base: 기본 설정 (tier 별 설정은 여기에 덮어쓴다)
+        tiers: tier 이름 -> EngineConfig 덮어쓸 값
+        default: 기본 tier
+        registry: 모델을 로드/공유/내리는 레지스트리
+    """
+
+    def __init__(self, base: EngineConfig, tiers: Dict[str, dict] = QUALITY_TIERS,
+                 default: str = DEFAULT_TIER, registry: ModelRegistry = model_registry):
+        if default not in tiers:
+            raise ValueError(f"Default quality tier '{default}' is not one of {', '.join(tiers)}")
+        self.default_tier = default
+        self.registry = registry
+        self._engines: Dict[str, Engine] = {}
+        for name, overrides in tiers.items():
+            if base.model_name == "stub":
+                overrides = {k: v for k, v in overrides.items() if k != "model_name"}
+            self._engines[name] = Engine(replace(base, **overrides))
+        self._lock = threading.Lock()
+        # 자동 로드 여부 (CLEANCUT_SKIP_MODEL 등으로 모델 없이 실행할 때 False)
+        self.autoload = True
+        # tier -> 마지막 swap() 상태
+        self._swaps: Dict[str, dict] = {}
+        registry.evict_listeners.append(self._unbind)
+
+    @classmethod
+    def from_env(cls, base: EngineConfig, **kwargs) -> "TieredEngines":
+        spec = os.getenv("CLEANCUT_QUALITY_TIERS")
+        if spec:
+            kwargs["tiers"] = parse_tiers(spec)
+        kwargs.setdefault("default", os.getenv("CLEANCUT_DEFAULT_TIER", DEFAULT_TIER))
+        return cls(base, **kwargs)
+
+    @property
+    def names(self):
+        return tuple(self._engines)
+
+    @property
+    def default(self) -> Engine:
+        return self._engines[self.default_tier]
+
+    def items(self):
+        return tuple(self._engines.items())
+
+    def describe(self) -> Dict[str, dict]:
+        """tier 별 모델, 입력 크기, 로드 여부"""
+        return {
+            name: {
+                "model": engine.config.model_name,
+                "input_size": engine.config.input_size,
+                "loaded": self.registry.is_loaded(engine.config.model_name),
+            }
+            for name, engine in self.items()
+        }
+
+    def swaps(self) -> Dict[str, dict]:
+        """tier 별 마지막 swap() 상태"""
+        with self._lock:
+            return {tier: dict(status) for tier, status in self._swaps.items()}
+
+    def swap(self, tier: str, model_name: str, input_size: Optional[int] = None) -> dict:
+        """
+        tier 의 모델 교체를 백그라운드로 시작
+
+        Args:
+            tier: 교체할 tier
+            model_name: 새 모델 (cleancut.models.load_model 이 받는 이름)
+            input_size: 새 입력 크기 (없으면 지금 값 유지)
+
+        Returns:
+            교체 상태 (status: loading -> warming -> draining -> succeeded/failed)
+
+        Raises:
+            ValueError: 알 수 없는 tier
+            RuntimeError: 그 tier 의 교체가 이미 진행 중
+        """
+        config = self.engine(tier).config
+        config = replace(config, model_name=model_name, input_size=input_size or config.input_size)
+        with self._lock:
+            previous = self._swaps.get(tier)
+            if previous is not None and previous["status"] not in SWAP_FINISHED:
+                raise RuntimeError(f"Model swap for tier '{tier}' already in progress")
+            status = {
+                "tier": tier,
+                "model": config.model_name,
+                "input_size": config.input_size,
+                "status": SWAP_LOADING,
+                "started_at": time.time(),
+            }
+            self._swaps[tier] = status
+        threading.Thread(target=self._swap, args=(tier, config, status), daemon=True).start()
+        return dict(status)
+
+    def _swap(self, tier: str, config: EngineConfig, status: dict):
+        engine = Engine(config)
+        try:
+            # 새 모델은 전환이 끝날 때까지 붙잡아 둔다 (예산 때문에 내려가지 않도록)
+            with self.registry.use(config.model_name, retry=True) as loaded:
+                if loaded is None:
+                    raise RuntimeError(f"Failed to load model {config.model_name}")
+                engine.model, engine.device = loaded.model, loaded.device
+                self._set_swap_status(status, SWAP_WARMING)
+                warm_up(engine)
+                with self._lock:
+                    old = self._engines[tier]
+                    self._engines[tier] = engine
+            logger.info(f"Quality tier '{tier}' switched to {config.model_name}")
+
+            # 이전 Engine 으로 처리 중인 요청이 끝나면 이전 모델을 내린다
+            # (다른 tier 가 같은 모델을 쓰고 있으면 그대로 둔다)
+            self._set_swap_status(status, SWAP_DRAINING)
+            old_model = old.config.model_name
+            if old_model != config.model_name and all(
+                other.config.model_name != old_model for _, other in self.items()
+            ):
+                self.registry.unload(old_model)
+                old.model = None
+        except Exception as e:
+            logger.error(f"Model swap for tier '{tier}' failed: {e}")
+            # 로드해 둔 새 모델을 쓰는 tier 가 없으면 내린다 (예산이 없으면 영영 남으므로)
+            self._unload_unused(config.model_name)
+            status["error"] = str(e)
+            self._set_swap_status(status, SWAP_FAILED)
+            MODEL_SWAPS.inc(result="failed")
+            return
+        self._set_swap_status(status, SWAP_SUCCEEDED)
+        MODEL_SWAPS.inc(result="succeeded")
+
+    def _set_swap_status(self, status: dict, value: str):
+        with self._lock:
+            status["status"] = value
+            if value in SWAP_FINISHED:
+                status["finished_at"] = time.time()
+
+    def engine(self, tier: Optional[str] = None) -> Engine:
+        """
+        tier 의 Engine (모델은 로드하지 않음, 설정만 쓸 때)
+
+        Raises:
+            ValueError: 알 수 없는 tier
+        """
+        engine = self._engines.get(tier or self.default_tier)
+        if engine is None:
+            raise ValueError(f"quality must be one of {', '.join(self._engines)}")
+        return engine
+
+    @contextmanager
+    def use(self, tier: Optional[str] = None) -> Iterator[Engine]:
+        """
+        블록 실행 동안 tier 의 모델을 로드된 상태로 유지한 Engine
+
+        모델 로드에 실패했거나 autoload 가 꺼져 있으면 모델 없이 (폴백으로) 동작한다.
+
+        Raises:
+            ValueError: 알 수 없는 tier
+        """
+        while True:
+            engine = self.engine(tier)
+            if not self.autoload and not engine.loaded:
+                yield engine
+                return
+            model_name = engine.config.model_name
+            if engine.loaded:
+                # Engine.load() 로 레지스트리 밖에서 로드된 모델
+                self.registry.adopt(model_name, engine.model, engine.device)
+            with self.registry.use(model_name) as loaded:
+                with self._lock:
+                    # 모델을 붙잡기 전에 swap() 이 tier 를 바꿨을 수 있다
+                    current = self._engines.get(tier or self.default_tier) is engine
+                    if current and loaded is not None:
+                        engine.model, engine.device = loaded.model, loaded.device
+                if current:
+                    yield engine
+                    return
+            # 교체된 이전 모델을 다시 올렸거나 등록했으면 내리고 새 Engine 으로 재시도
+            self._unload_unused(model_name, timeout=0)
+
+    def _unload_unused(self, model_name: str, timeout: Optional[float] = None):
+        """어느 tier 도 쓰지 않는 모델이면 레지스트리에서 내림"""
+        if all(engine.config.model_name != model_name for _, engine in self.items()):
+            self.registry.unload(model_name, timeout=timeout)
+
+    def preload(self, tier: Optional[str] = None) -> bool:
+        """
+        tier 의 모델을 미리 로드 (요청 밖에서, 예: 스레드 풀에서 호출)
+
+        Returns:
+            모델이 로드되었는지 (실패하거나 autoload 가 꺼져 있으면 False)
+        """
+        with self.use(tier) as engine:
+            return engine.loaded
+
+    def _unbind(self, model_name: str):
+        """레지스트리가 내린 모델을 tier 엔진에서 떼어 냄 (메모리가 실제로 해제되도록)"""
+        with self._lock:
+            for engine in self._engines.values():
+                if engine.config.model_name == model_name:
+                    engine.model = None
+
+
+def warm_up(engine: Engine, runs: int = WARMUP_RUNS):
+    """입력 크기의 회색 이미지로 추론을 몇 번 돌려 본다 (결과와 단계/배치 메트릭은 버림)"""
+    size = engine.config.input_size
+    image = Image.new("RGB", (size, size), (128, 128, 128))
+    with untracked():
+        for _ in range(runs):
+            engine.release(engine.postprocess(image, engine.infer(image)))
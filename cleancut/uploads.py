@@ -0,0 +1,162 @@
+"""
+업로드 단계: 요청 본문 크기 제한과 이미지 형식 확인
+
+UploadLimitMiddleware 는 본문을 받는 동안 누적 바이트를 세어 한도를 넘는 순간
+413 으로 중단한다 (Content-Length 가 한도를 넘으면 본문을 읽지 않고 바로 413).
+multipart 파서가 업로드를 SpooledTemporaryFile 로 받아 두면 open_upload() 가
+파일 크기와 헤더 매직 바이트를 확인하고, 디코더는 그 파일을 그대로 읽는다
+(await file.read() 로 바이트 복사본을 만들지 않음).
+
+환경 변수:
+CLEANCUT_MAX_REQUEST_MB: 요청 본문 전체 한도 (기본값 64, 배치 요청 포함)
+CLEANCUT_MAX_UPLOAD_MB: 파일 하나의 한도 (기본값 10, 앱의 업로드 제한과 같음)
+CLEANCUT_UPLOAD_FORMATS: 허용 형식 (기본값 JPEG,PNG,WEBP)
+"""
+
+import json
+import os
+from typing import BinaryIO, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+
+MAX_REQUEST_BYTES = int(float(os.getenv("CLEANCUT_MAX_REQUEST_MB", "64")) * 2**20)
+MAX_UPLOAD_BYTES = int(float(os.getenv("CLEANCUT_MAX_UPLOAD_MB", "10")) * 2**20)
+ALLOWED_FORMATS = tuple(
+    name.strip().upper()
+    for name in os.getenv("CLEANCUT_UPLOAD_FORMATS", "JPEG,PNG,WEBP").split(",")
+    if name.strip()
+)
+
+# 형식 판별에 읽는 앞부분 바이트 수
+SNIFF_BYTES = 16
+
+# 본문 크기 제한을 적용할 HTTP 메서드
+BODY_METHODS = ("POST", "PUT", "PATCH")
+
+
+def _megabytes(limit: int) -> str:
+    return f"{round(limit / 2**20, 2):g}MB"
+
+
+class UploadTooLarge(HTTPException):
+    """요청 본문이 한도를 넘음 (413)"""
+
+    def __init__(self, limit: int):
+        super().__init__(status_code=413, detail=f"Request body too large (limit {_megabytes(limit)})")
+
+
+def sniff_format(header: bytes) -> Optional[str]:
+    """파일 앞부분 매직 바이트로 Pillow 형식 이름 판별 (모르면 None)"""
+    if header.startswith(b"\xff\xd8\xff"):
+        return "JPEG"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "PNG"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "WEBP"
+    if header[:6] in (b"GIF87a", b"GIF89a"):
+        return "GIF"
+    if header.startswith(b"BM"):
+        return "BMP"
+    if header[:4] in (b"II*\x00", b"MM\x00*"):
+        return "TIFF"
+    return None
+
+
+def open_upload(file: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES,
+                formats: Tuple[str, ...] = ALLOWED_FORMATS) -> Tuple[BinaryIO, str, int]:
+    """
+    스풀된 업로드 파일의 크기와 형식 확인
+
+    Returns:
+        (처음 위치로 되감은 파일 객체, Pillow 형식 이름, 바이트 수)
+
+    Raises:
+        HTTPException: 413 (파일이 한도 초과), 415 (허용하지 않는 형식)
+    """
+    fp = file.file
+    size = file.size
+    if size is None:
+        fp.seek(0, os.SEEK_END)
+        size = fp.tell()
+    if size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"File too large (limit {_megabytes(max_bytes)})")
+
+    fp.seek(0)
+    image_format = sniff_format(fp.read(SNIFF_BYTES))
+    fp.seek(0)
+    if image_format not in formats:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Unsupported image format (allowed: {', '.join(formats)})"
+        )
+    return fp, image_format, size
+
+
+class UploadLimitMiddleware:
+    """
+    요청 본문 크기 제한 ASGI 미들웨어
+
+    Args:
+        app: 감쌀 ASGI 앱
+        max_bytes: 요청 본문 최대 바이트
+    """
+
+    def __init__(self, app, max_bytes: int = MAX_REQUEST_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in BODY_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        # Content-Length 로 미리 알 수 있으면 본문을 받지 않고 거절
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    declared = 0
+                if declared > self.max_bytes:
+                    await self._reject(send)
+                    return
+                break
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise UploadTooLarge(self.max_bytes)
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except UploadTooLarge:
+            # 보통은 앱의 예외 처리기가 413 으로 바꾸고, 그 밖에서 읽힌 경우만 여기로 온다
+            if response_started:
+                raise
+            await self._reject(send)
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": UploadTooLarge(self.max_bytes).detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
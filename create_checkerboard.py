@@ -1,30 +1,29 @@
-from PIL import Image
+"""
+앱 투명 배경 에셋(assets/images/checkerboard.png) 생성
+
+사용법:
+python create_checkerboard.py [--size 40] [--square-size 20] [--output assets/images/checkerboard.png]
+"""
+
+import argparse
 import os
 
-def create_checkerboard():
-    size = 40
-    square_size = 20
-    
-    img = Image.new('RGBA', (size, size), (255, 255, 255, 0))
-    
-    for y in range(0, size, square_size):
-        for x in range(0, size, square_size):
-            if (x // square_size + y // square_size) % 2 == 0:
-                for i in range(square_size):
-                    for j in range(square_size):
-                        if x + i < size and y + j < size:
-                            img.putpixel((x + i, y + j), (230, 230, 230, 255))
-            else:
-                for i in range(square_size):
-                    for j in range(square_size):
-                        if x + i < size and y + j < size:
-                            img.putpixel((x + i, y + j), (255, 255, 255, 255))
+from cleancut.compose import CHECKERBOARD_COLORS, CHECKERBOARD_SQUARE, checkerboard
+
+
+def create_checkerboard(size=40, square_size=CHECKERBOARD_SQUARE, output='assets/images/checkerboard.png'):
+    colors = [color + (255,) for color in CHECKERBOARD_COLORS]
+    img = checkerboard((size, size), square_size, colors, mode='RGBA')
     
-    output_dir = 'assets/images'
-    os.makedirs(output_dir, exist_ok=True)
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
     
-    img.save(f'{output_dir}/checkerboard.png')
-    print(f'Checkerboard pattern created: {output_dir}/checkerboard.png')
+    img.save(output)
+    print(f'Checkerboard pattern created: {output}')
 
 if __name__ == '__main__':
-    create_checkerboard()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Create the checkerboard background asset')
+    parser.add_argument('--size', type=int, default=40)
+    parser.add_argument('--square-size', type=int, default=CHECKERBOARD_SQUARE)
+    parser.add_argument('--output', default='assets/images/checkerboard.png')
+    args = parser.parse_args()
+    create_checkerboard(args.size, args.square_size, args.output)
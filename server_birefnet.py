@@ -10,186 +10,279 @@ pip install timm einops
 uvicorn server_birefnet:app --reload --host 0.0.0.0 --port 8000
 """
 
-from fastapi import FastAPI, File, UploadFile, HTTPException
-from fastapi.responses import Response
+from fastapi import FastAPI, File, UploadFile, HTTPException, Header, Request, Depends
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from PIL import Image, ImageOps
-import io
-import torch
-import numpy as np
-from typing import Tuple
+from typing import Optional, Tuple
+from PIL import Image
 import logging
+import json
+import hmac
+import os
+import signal
+import threading
+import time
+
+from cleancut.admission import AdmissionRejected, memory_budget
+from cleancut.compose import BACKGROUNDS, CROP_MARGIN, alpha_bbox, apply_background, is_background
+from cleancut.engine import Engine, EngineConfig, ImageTooLarge
+from cleancut.outline import OUTLINE_TOLERANCE, extract_outline, to_json, to_svg
+from cleancut.tiers import TieredEngines
+from cleancut.uploads import UploadLimitMiddleware, open_upload
+from cleancut.profiler import profile_session
+from cleancut.jobs import JobStore, Job, STATUS_SUCCEEDED, STATUS_FAILED, iter_events
+from cleancut.metrics import (
+    REGISTRY, REQUESTS, REQUEST_SECONDS, IN_FLIGHT, CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    Gauge, StageTimings, stage, track_stages,
+)
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+# 요청당 한 줄씩 JSON 으로 남기는 액세스 로그
+access_logger = logging.getLogger("cleancut.access")
 
 app = FastAPI(title="CleanCut API", version="1.0.0")
 
-# CORS 설정
+# 요청 본문 크기 제한 (CLEANCUT_MAX_REQUEST_MB, 초과 시 본문을 다 받기 전에 413)
+app.add_middleware(UploadLimitMiddleware)
+# CORS 설정 (나중에 추가한 미들웨어가 바깥쪽이므로 413 응답에도 CORS 헤더가 붙는다)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Crop-Offset", "X-Original-Size"],
+)
+
+# 품질 tier 별 배경 제거 엔진 (설정은 CLEANCUT_* 환경 변수, cleancut/engine.py, cleancut/tiers.py 참고)
+# 모델은 cleancut/models.py 의 레지스트리가 처음 요청될 때 로드하고 메모리 예산에 맞춰 내린다
+tiered_engines = TieredEngines.from_env(EngineConfig.from_env())
+# 시작 시점의 기본 tier 엔진 (app.py, 벤치마크용, 서버 요청 처리는 tiered_engines.use() 안에서)
+engine = tiered_engines.default
+
+# 비동기 작업 저장소 (POST /jobs)
+job_store = JobStore(
+    ttl_seconds=float(os.getenv("CLEANCUT_JOB_TTL", "600")),
+    max_workers=int(os.getenv("CLEANCUT_JOB_WORKERS", "1")),
+    max_pending=int(os.getenv("CLEANCUT_JOB_MAX_PENDING", "100")),
+    max_finished=int(os.getenv("CLEANCUT_JOB_MAX_FINISHED", "200")),
 )
+REGISTRY.register(Gauge(
+    "cleancut_job_queue_depth",
+    "Jobs waiting for a worker",
+    func=job_store.queue_depth,
+))
+
+# 프로파일러 요청 수 집계에서 제외할 경로
+UNPROFILED_PREFIXES = ("/admin", "/metrics", "/health")
 
-# 글로벌 모델 변수
-model = None
-device = None
+def log_access(endpoint: str, filename: Optional[str], timings: StageTimings, **fields):
+    """요청 하나의 단계별 시간과 크기 정보를 JSON 한 줄로 기록"""
+    record = {
+        "endpoint": endpoint,
+        "filename": filename,
+        "total_ms": round(timings.elapsed() * 1000, 2),
+        "timings_ms": {name: round(sec * 1000, 2) for name, sec in timings.grouped().items()},
+        "stages_ms": timings.as_millis(),
+        **fields,
+    }
+    access_logger.info(json.dumps(record, ensure_ascii=False))
 
-def load_model():
-    """BiRefNet 모델 로드"""
-    global model, device
+def resolve_tier(quality: Optional[str]) -> str:
+    """
+    quality 파라미터 -> tier 이름
     
+    예전 클라이언트가 보내던 숫자 값(PNG 품질, PNG 저장에는 효과가 없었음)은 기본 tier 로 처리한다.
+    """
+    if quality is None or quality.isdigit():
+        return tiered_engines.default_tier
     try:
-        # GPU 사용 가능 여부 확인
-        device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        logger.info(f"Using device: {device}")
-        
-        # Hugging Face에서 BiRefNet 모델 로드
-        from transformers import AutoModelForImageSegmentation, AutoProcessor
-        
-        model_name = "ZhengPeng7/BiRefNet_HR"
-        logger.info(f"Loading model: {model_name}")
-        
-        # 모델과 프로세서 로드
-        model = AutoModelForImageSegmentation.from_pretrained(
-            model_name,
-            trust_remote_code=True
+        tiered_engines.engine(quality)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return quality
+
+# format 파라미터 값
+OUTPUT_FORMATS = ("png", "jpeg", "svg", "json")
+# 피사체 외곽선(벡터)을 돌려주는 형식
+OUTLINE_FORMATS = ("svg", "json")
+# 결과 media type -> 다운로드 파일 확장자
+RESULT_EXTENSIONS = {"image/png": "png", "image/jpeg": "jpg", "image/svg+xml": "svg", "application/json": "json"}
+
+def check_output_options(background: Optional[str], has_background_file: bool,
+                         output_format: Optional[str]):
+    """background/format 파라미터 검사 (잘못되면 400)"""
+    if background is not None and not is_background(background):
+        raise HTTPException(
+            status_code=400,
+            detail=f"background must be one of {', '.join(BACKGROUNDS)} or a #RRGGBB color"
         )
-        model = model.to(device)
-        model.eval()
-        
-        logger.info("Model loaded successfully")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Failed to load model: {e}")
-        logger.info("Using fallback mode (returning original image)")
-        return False
+    if background == "image" and not has_background_file:
+        raise HTTPException(status_code=400, detail="background=image needs a background_file upload")
+    if output_format is not None and output_format not in OUTPUT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(OUTPUT_FORMATS)}")
+    if output_format == "jpeg" and background is None:
+        raise HTTPException(status_code=400, detail="JPEG output needs a background (JPEG has no alpha)")
+    if output_format in OUTLINE_FORMATS and background is not None:
+        raise HTTPException(status_code=400, detail=f"{output_format} outline output has no background")
 
-def process_image(image: Image.Image) -> Image.Image:
+def open_image(engine: Engine, file: UploadFile) -> Tuple[Image.Image, int]:
     """
-    BiRefNet을 사용해 배경 제거
+    업로드 크기/형식 확인 후 헤더만 읽어 크기 검사 (픽셀 예산을 넘으면 디코드하지 않음)
     
-    Args:
-        image: PIL Image 객체
-        
     Returns:
-        배경이 제거된 RGBA PIL Image
+        (open() 결과 이미지, 업로드 바이트 수)
     """
+    # 스풀된 파일에서 바로 디코드
+    with stage("read"):
+        source, image_format, size = open_upload(file)
     try:
-        if model is None:
-            logger.warning("Model not loaded, returning original image with alpha channel")
-            return image.convert("RGBA")
-        
-        # 이미지 전처리
-        original_size = image.size
-        
-        # 모델 입력 크기로 리사이즈 (BiRefNet은 다양한 크기 지원)
-        # 일반적으로 1024x1024가 좋은 성능을 보임
-        input_size = (1024, 1024)
-        image_resized = image.resize(input_size, Image.Resampling.LANCZOS)
-        
-        # NumPy 배열로 변환
-        image_np = np.array(image_resized)
-        
-        # 정규화 (0-1 범위)
-        if image_np.max() > 1:
-            image_np = image_np / 255.0
-        
-        # 텐서로 변환 (batch_size, channels, height, width)
-        image_tensor = torch.from_numpy(image_np).float()
-        if len(image_tensor.shape) == 3:
-            image_tensor = image_tensor.permute(2, 0, 1)  # HWC -> CHW
-        image_tensor = image_tensor.unsqueeze(0)  # 배치 차원 추가
-        image_tensor = image_tensor.to(device)
-        
-        # 모델 추론 - BiRefNet의 predict 메서드 사용
-        with torch.no_grad():
-            # BiRefNet은 PIL Image를 직접 받음
-            try:
-                # predict 메서드가 있는 경우
-                if hasattr(model, 'predict'):
-                    mask = model.predict(image)
-                    # mask가 PIL Image인 경우 numpy로 변환
-                    if isinstance(mask, Image.Image):
-                        mask = np.array(mask) / 255.0
-                else:
-                    # 일반적인 forward 방식
-                    output = model(image_tensor)
-                    
-                    # 출력 형식에 따라 처리
-                    if isinstance(output, dict):
-                        mask = output.get('logits', output.get('out', output))
-                    elif isinstance(output, (list, tuple)):
-                        # BiRefNet이 리스트를 반환하는 경우 (multi-scale output)
-                        # 마지막 스케일의 출력 사용
-                        mask = output[-1] if len(output) > 0 else output[0]
-                    else:
-                        mask = output
-                    
-                    # mask가 이미 텐서가 아닌 경우 텐서로 변환
-                    if not isinstance(mask, torch.Tensor):
-                        if isinstance(mask, list):
-                            mask = mask[0] if len(mask) > 0 else mask
-                        mask = torch.tensor(mask) if not isinstance(mask, torch.Tensor) else mask
-                    
-                    # 시그모이드 적용하여 0-1 범위로 변환
-                    mask = torch.sigmoid(mask)
-                    mask = mask.squeeze().cpu().numpy()
-            except Exception as e:
-                logger.error(f"Model inference failed: {e}")
-                raise
-        
-        # 마스크를 원본 크기로 리사이즈
-        mask_pil = Image.fromarray((mask * 255).astype(np.uint8))
-        mask_pil = mask_pil.resize(original_size, Image.Resampling.LANCZOS)
-        
-        # 원본 이미지를 RGBA로 변환
-        image_rgba = image.convert("RGBA")
-        
-        # 마스크를 알파 채널로 적용
-        image_rgba.putalpha(mask_pil)
-        
-        return image_rgba
-        
-    except Exception as e:
-        logger.error(f"Error processing image: {e}")
-        # 에러 발생 시 원본 이미지를 RGBA로 변환하여 반환
-        return image.convert("RGBA")
+        return engine.open(source, formats=(image_format,)), size
+    except ImageTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-def simple_background_removal(image: Image.Image) -> Image.Image:
-    """
-    간단한 배경 제거 (폴백 메서드)
-    실제 모델이 로드되지 않았을 때 사용
+def read_image_bytes(engine: Engine, file: UploadFile) -> bytes:
+    """open_image() 로 크기를 검사한 뒤 업로드 전체를 바이트로 읽음"""
+    open_image(engine, file)
+    with stage("read"):
+        file.file.seek(0)
+        return file.file.read()
+
+def crop_to_subject(result: Image.Image, source: Image.Image,
+                    margin: int) -> Tuple[Image.Image, Image.Image, Tuple[int, int, int, int]]:
     """
-    # 이미지를 RGBA로 변환
-    image_rgba = image.convert("RGBA")
+    결과와 원본을 피사체 영역(+margin)으로 자름 (피사체가 없으면 자르지 않음)
     
-    # 간단한 임계값 기반 마스크 생성 (데모용)
-    # 실제로는 BiRefNet 모델을 사용해야 함
-    data = image_rgba.getdata()
-    new_data = []
+    Returns:
+        (잘린 결과, 잘린 원본, box)
+    """
+    with stage("crop"):
+        box = alpha_bbox(result, margin) or (0, 0) + result.size
+        if box == (0, 0) + result.size:
+            return result, source, box
+        return result.crop(box), source.crop(box), box
+
+def encode_result(engine: Engine, result: Image.Image, source: Image.Image,
+                  background: Optional[str] = None, background_image: Optional[Image.Image] = None,
+                  output_format: Optional[str] = None,
+                  outline_tolerance: float = OUTLINE_TOLERANCE) -> Tuple[bytes, str]:
+    """
+    배경 제거 결과 인코딩 (background 가 있으면 합성해 기본값 JPEG, 없으면 투명 PNG,
+    format 이 svg/json 이면 알파 평면의 피사체 외곽선)
     
-    for item in data:
-        # 흰색 배경을 투명하게 만들기 (매우 단순한 예제)
-        if item[0] > 240 and item[1] > 240 and item[2] > 240:
-            new_data.append((item[0], item[1], item[2], 0))
-        else:
-            new_data.append(item)
+    Returns:
+        (인코딩된 바이트, media type)
+    """
+    if output_format in OUTLINE_FORMATS:
+        with stage("outline"):
+            contours = extract_outline(result, tolerance=outline_tolerance)
+            if output_format == "svg":
+                return to_svg(contours, result.size).encode(), "image/svg+xml"
+            return json.dumps(to_json(contours, result.size)).encode(), "application/json"
+    if background is None:
+        return engine.encode_png(result), "image/png"
+    with stage("background"):
+        composed = apply_background(result, background, source=source, background_image=background_image)
+    if output_format == "png":
+        return engine.encode_png(composed), "image/png"
+    return engine.encode_jpeg(composed), "image/jpeg"
+
+def run_job(job: Job, contents: bytes, tier: str, background: Optional[str] = None,
+            background_contents: Optional[bytes] = None,
+            output_format: Optional[str] = None) -> Tuple[bytes, str]:
+    """비동기 작업 실행 (JobStore 스레드 풀에서 호출)"""
+    with tiered_engines.use(tier) as engine, track_stages() as timings:
+        image = engine.open(contents)
+        background_image = engine.open(background_contents) if background_contents else None
+        reserved = engine.estimate_memory(image)
+        if background_image is not None:
+            reserved += engine.estimate_memory(background_image)
+        # 메모리 예산에 자리가 날 때까지 기다린 뒤 디코드
+        with memory_budget.reserve(reserved, timeout=None):
+            image = engine.prepare(engine.decode(image))
+            if background_image is not None:
+                background_image = engine.prepare(engine.decode(background_image))
+            job.emit("decoded", 0.1, width=image.width, height=image.height)
+            
+            job.emit("inference_started", 0.2)
+            result = engine.remove_background(image)
+            job.emit("inference_done", 0.8)
+            
+            try:
+                output, media_type = encode_result(
+                    engine, result, image, background, background_image, output_format
+                )
+            finally:
+                engine.release(result)
+            job.emit("encoded", 0.95, bytes=len(output))
     
-    image_rgba.putdata(new_data)
-    return image_rgba
+    log_access("/jobs", job.filename, timings, job_id=job.id,
+               model=engine.config.model_name, input_size=engine.config.input_size,
+               width=image.width, height=image.height,
+               bytes_in=len(contents), bytes_out=len(output), background=background)
+    return output, media_type
 
 @app.on_event("startup")
 async def startup_event():
     """서버 시작 시 모델 로드"""
-    success = load_model()
-    if not success:
-        logger.warning("Running in demo mode without BiRefNet model")
+    if os.getenv("CLEANCUT_SKIP_MODEL") == "1":
+        # 부하 테스트 등 가중치 없이 실행할 때
+        logger.warning("CLEANCUT_SKIP_MODEL=1, running in demo mode without BiRefNet model")
+        tiered_engines.autoload = False
+    else:
+        # 기본 tier 모델은 첫 요청을 기다리지 않고 미리 로드
+        if not tiered_engines.preload():
+            logger.warning("Running in demo mode without BiRefNet model")
+    
+    # SIGUSR1 로 프로파일링 켜기/끄기 (kill -USR1 <pid>)
+    # 신호 핸들러는 메인 스레드에서만 설치할 수 있다 (TestClient, app.py 의 서버 스레드 등은 불가)
+    if hasattr(signal, "SIGUSR1") and threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGUSR1, handle_profile_signal)
+    else:
+        logger.info("SIGUSR1 profiling trigger unavailable (no SIGUSR1 or not in the main thread)")
+
+def handle_profile_signal(signum, frame):
+    """SIGUSR1 핸들러: 세션이 없으면 시작, 실행 중이면 종료"""
+    def toggle():
+        if profile_session.active:
+            profile_session.stop()
+        else:
+            profile_session.start(
+                seconds=float(os.getenv("CLEANCUT_PROFILE_SECONDS", "30")),
+                torch_profile=os.getenv("CLEANCUT_PROFILE_TORCH", "0") == "1",
+            )
+    # 신호 핸들러는 메인 스레드(이벤트 루프)를 끊고 들어오므로
+    # lock 을 잡을 수 있는 작업은 별도 스레드에서 실행
+    threading.Thread(target=toggle, daemon=True).start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """서버 종료 시 작업 스레드 풀 정리"""
+    job_store.shutdown()
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """엔드포인트/상태 코드별 요청 수와 지연 시간 기록"""
+    start = time.perf_counter()
+    IN_FLIGHT.inc()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        IN_FLIGHT.dec()
+        # 작업 ID 등으로 라벨이 늘어나지 않도록 라우트 경로 템플릿 사용
+        route = request.scope.get("route")
+        endpoint = route.path if route is not None else "unmatched"
+        REQUESTS.inc(endpoint=endpoint, method=request.method, status=str(status))
+        REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
+        if not endpoint.startswith(UNPROFILED_PREFIXES):
+            profile_session.request_done()
 
 @app.get("/")
 async def root():
@@ -197,8 +290,9 @@ async def root():
     return {
         "service": "CleanCut Background Removal API",
         "status": "running",
-        "model_loaded": model is not None,
-        "device": str(device) if device else "cpu"
+        "model_loaded": tiered_engines.default.loaded,
+        "device": str(tiered_engines.default.device) if tiered_engines.default.device else "cpu",
+        "quality_tiers": tiered_engines.describe()
     }
 
 @app.get("/health")
@@ -206,88 +300,115 @@ async def health_check():
     """헬스 체크 엔드포인트"""
     return {
         "status": "healthy",
-        "model_loaded": model is not None
+        "model_loaded": tiered_engines.default.loaded
     }
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus 메트릭 엔드포인트"""
+    return Response(content=REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+# 디코드/추론/인코딩(과 처음 요청된 tier 의 모델 로드)은 동기 작업이므로 배경 제거
+# 엔드포인트는 일반 def 로 두어 FastAPI 스레드 풀에서 실행한다
+# (이벤트 루프를 막으면 /health, /metrics, 작업 폴링/이벤트 스트림이 멈춘다)
 @app.post("/remove-background")
-async def remove_background(
+def remove_background(
     file: UploadFile = File(...),
-    quality: int = 95
+    quality: Optional[str] = None,
+    background: Optional[str] = None,
+    background_file: Optional[UploadFile] = File(None),
+    format: Optional[str] = None,
+    crop: bool = False,
+    crop_margin: int = CROP_MARGIN,
+    tolerance: float = OUTLINE_TOLERANCE
 ):
     """
     이미지 배경 제거 API
     
     Args:
         file: 업로드된 이미지 파일
-        quality: PNG 압축 품질 (1-100, 기본값 95)
+        quality: 품질 tier (preview, standard, high; 기본값 CLEANCUT_DEFAULT_TIER)
+        background: 결과를 합성할 배경 (없으면 투명 PNG)
+            checkerboard: 알파를 표시하지 못하는 클라이언트용 체커보드 미리보기
+            blur: 흐리게 한 원본, image: background_file, #RRGGBB: 단색
+        background_file: background=image 일 때 배경 이미지
+        format: 결과 형식 (png, jpeg; 배경을 합성하면 기본값 jpeg, 아니면 png)
+            svg, json: 이미지 대신 피사체 외곽선 (SVG path, JSON 다각형, 배경 합성 불가)
+        crop: 결과를 피사체 영역으로 자름 (원본 기준 위치는 X-Crop-Offset: x,y,
+            원본 크기는 X-Original-Size: WxH 헤더, 외곽선 좌표도 잘린 영역 기준)
+        crop_margin: 자를 때 피사체 둘레에 남길 여백 (픽셀)
+        tolerance: 외곽선 단순화 허용 오차 (픽셀, 클수록 꼭짓점이 적음)
         
     Returns:
-        배경이 제거된 PNG 이미지
+        배경이 제거된 PNG 이미지 (배경을 합성하면 JPEG, format=svg/json 이면 외곽선)
     """
     try:
         # 파일 유효성 검사
         if not file.content_type.startswith("image/"):
             raise HTTPException(status_code=400, detail="File must be an image")
+        tier = resolve_tier(quality)
+        check_output_options(background, background_file is not None, format)
+        if crop_margin < 0:
+            raise HTTPException(status_code=400, detail="crop_margin must not be negative")
+        if tolerance < 0:
+            raise HTTPException(status_code=400, detail="tolerance must not be negative")
         
-        # 이미지 읽기
-        contents = await file.read()
-        image = Image.open(io.BytesIO(contents))
-        
-        # EXIF 오리엔테이션 처리
-        try:
-            # EXIF 데이터에 따라 이미지 자동 회전
-            image = ImageOps.exif_transpose(image)
-        except Exception as e:
-            logger.debug(f"EXIF processing skipped: {e}")
-        
-        # 이미지 크기 체크
-        width, height = image.size
-        if width < 100 or height < 100:
-            raise HTTPException(status_code=400, detail="Image too small (minimum 100x100)")
-        if width > 4096 or height > 4096:
-            # 큰 이미지는 자동 리사이징
-            max_size = 2048
-            if width > height:
-                new_width = max_size
-                new_height = int(height * (max_size / width))
-            else:
-                new_height = max_size
-                new_width = int(width * (max_size / height))
-            image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            logger.info(f"Resized image from {width}x{height} to {new_width}x{new_height}")
-        
-        # RGB로 변환 (RGBA 이미지 처리를 위해)
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        logger.info(f"Processing image: {file.filename}, size: {image.size}")
-        
-        # 배경 제거 처리
-        if model is not None:
-            result = process_image(image)
-        else:
-            # 모델이 없으면 간단한 폴백 메서드 사용
-            result = simple_background_removal(image)
+        headers = {}
+        with tiered_engines.use(tier) as engine, track_stages() as timings:
+            image, bytes_in = open_image(engine, file)
+            background_image = None
+            reserved = engine.estimate_memory(image)
+            if background == "image":
+                background_image, _ = open_image(engine, background_file)
+                reserved += engine.estimate_memory(background_image)
+            
+            # 최악의 메모리를 예약한 뒤에 디코드/처리 (예산이 모자라면 503)
+            with memory_budget.reserve(reserved):
+                image = engine.prepare(engine.decode(image))
+                if background_image is not None:
+                    background_image = engine.prepare(engine.decode(background_image))
+                
+                logger.debug(f"Processing image: {file.filename}, size: {image.size}")
+                
+                # 배경 제거 처리 후 인코딩 (인코딩이 끝나면 결과 버퍼를 바로 풀에 반납)
+                result = engine.remove_background(image)
+                try:
+                    output_image, source = result, image
+                    if crop:
+                        output_image, source, box = crop_to_subject(result, image, crop_margin)
+                        headers["X-Crop-Offset"] = f"{box[0]},{box[1]}"
+                        headers["X-Original-Size"] = f"{image.width}x{image.height}"
+                    output, media_type = encode_result(
+                        engine, output_image, source, background, background_image, format, tolerance
+                    )
+                finally:
+                    engine.release(result)
         
-        # PNG로 저장
-        output = io.BytesIO()
-        result.save(output, format="PNG", quality=quality, optimize=True)
-        output.seek(0)
+        log_access("/remove-background", file.filename, timings,
+                   model=engine.config.model_name, input_size=engine.config.input_size,
+                   width=image.width, height=image.height,
+                   bytes_in=bytes_in, bytes_out=len(output), background=background)
         
         return Response(
-            content=output.getvalue(),
-            media_type="image/png",
+            content=output,
+            media_type=media_type,
             headers={
-                "Content-Disposition": f"attachment; filename=cleaned_{file.filename}.png"
+                "Content-Disposition": f"attachment; filename=cleaned_{file.filename}.{RESULT_EXTENSIONS[media_type]}",
+                "Server-Timing": timings.server_timing(),
+                **headers,
             }
         )
         
+    except HTTPException:
+        raise
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         logger.error(f"Error processing request: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/remove-background-batch")
-async def remove_background_batch(files: list[UploadFile] = File(...)):
+def remove_background_batch(files: list[UploadFile] = File(...)):
     """
     여러 이미지 배경 제거 (배치 처리)
     
@@ -302,48 +423,27 @@ async def remove_background_batch(files: list[UploadFile] = File(...)):
     for file in files:
         try:
             # 각 파일 처리
-            contents = await file.read()
-            image = Image.open(io.BytesIO(contents))
-            
-            # EXIF 오리엔테이션 처리
-            try:
-                image = ImageOps.exif_transpose(image)
-            except Exception as e:
-                logger.debug(f"EXIF processing skipped: {e}")
-            
-            # 이미지 크기 체크 및 리사이징
-            width, height = image.size
-            if width < 100 or height < 100:
-                raise ValueError("Image too small")
-            if width > 4096 or height > 4096:
-                max_size = 2048
-                if width > height:
-                    new_width = max_size
-                    new_height = int(height * (max_size / width))
-                else:
-                    new_height = max_size
-                    new_width = int(width * (max_size / height))
-                image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # 배경 제거
-            if model is not None:
-                result = process_image(image)
-            else:
-                result = simple_background_removal(image)
-            
-            # 결과 저장
-            output = io.BytesIO()
-            result.save(output, format="PNG", optimize=True)
+            with stage("read"):
+                source, image_format, _ = open_upload(file)
+            with tiered_engines.use() as engine:
+                image = engine.open(source, formats=(image_format,))
+                
+                # 배경 제거 후 결과 저장
+                with memory_budget.reserve(engine.estimate_memory(image)):
+                    output = engine.remove_background_png(engine.prepare(engine.decode(image)))
             
             results.append({
                 "filename": file.filename,
                 "status": "success",
-                "size": len(output.getvalue())
+                "size": len(output)
             })
             
+        except HTTPException as e:
+            results.append({
+                "filename": file.filename,
+                "status": "failed",
+                "error": e.detail
+            })
         except Exception as e:
             results.append({
                 "filename": file.filename,
@@ -353,6 +453,212 @@ async def remove_background_batch(files: list[UploadFile] = File(...)):
     
     return {"results": results}
 
+@app.post("/jobs", status_code=202)
+async def create_job(
+    file: UploadFile = File(...),
+    quality: Optional[str] = None,
+    background: Optional[str] = None,
+    background_file: Optional[UploadFile] = File(None),
+    format: Optional[str] = None
+):
+    """
+    배경 제거 작업 등록 (비동기)
+    
+    업로드된 이미지를 작업 큐에 넣고 즉시 작업 ID를 반환한다.
+    클라이언트는 GET /jobs/{id} 로 상태를 폴링한 뒤
+    GET /jobs/{id}/result 로 결과를 받는다.
+    
+    Args:
+        file: 업로드된 이미지 파일
+        quality: 품질 tier (preview, standard, high; 기본값 CLEANCUT_DEFAULT_TIER)
+        background: 결과를 합성할 배경 (POST /remove-background 와 같음)
+        background_file: background=image 일 때 배경 이미지
+        format: 결과 형식 (png, jpeg, svg, json)
+        
+    Returns:
+        작업 상태 정보 (id, status, urls)
+    """
+    if not file.content_type or not file.content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="File must be an image")
+    tier = resolve_tier(quality)
+    check_output_options(background, background_file is not None, format)
+    
+    # 작업은 요청이 끝난 뒤 실행되므로 (스풀 파일이 닫힘) 바이트로 읽어 둔다
+    # 크기 검사는 헤더만 읽어 등록 시점에 (디코드는 작업에서)
+    engine = tiered_engines.engine(tier)
+    contents = read_image_bytes(engine, file)
+    background_contents = read_image_bytes(engine, background_file) if background == "image" else None
+    try:
+        job = job_store.submit(
+            lambda job: run_job(job, contents, tier, background, background_contents, format),
+            filename=file.filename
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    logger.info(f"Job created: {job.id}, file: {file.filename}")
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """작업 상태/진행률 조회"""
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    format: str = "sse",
+    last_event_id: Optional[str] = Header(None)
+):
+    """
+    작업 단계 이벤트 스트리밍
+    
+    queued(대기 순번), started, decoded, inference_started, inference_done,
+    encoded, succeeded/failed 이벤트를 타임스탬프와 함께 실시간으로 전송한다.
+    
+    Args:
+        job_id: 작업 ID
+        format: "sse" (text/event-stream, 기본값) 또는 "ndjson"
+        last_event_id: SSE 재연결 시 마지막으로 받은 이벤트 ID
+    """
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if format not in ("sse", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be 'sse' or 'ndjson'")
+    
+    start = 0
+    if last_event_id is not None and last_event_id.isdigit():
+        start = int(last_event_id) + 1
+    
+    async def sse():
+        async for index, event in iter_events(job, start):
+            yield f"id: {index}\nevent: {event['event']}\ndata: {json.dumps(event)}\n\n"
+    
+    async def ndjson():
+        async for _, event in iter_events(job, start):
+            yield json.dumps(event) + "\n"
+    
+    if format == "ndjson":
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+    return StreamingResponse(
+        sse(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """완료된 작업의 결과 이미지 반환"""
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status == STATUS_FAILED:
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status != STATUS_SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"Job not finished (status: {job.status})")
+    
+    return Response(
+        content=job.result,
+        media_type=job.media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename=cleaned_{job.filename}.{RESULT_EXTENSIONS[job.media_type]}"
+        }
+    )
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """
+    관리자 엔드포인트 인증
+    
+    CLEANCUT_ADMIN_TOKEN 환경 변수가 없으면 관리자 엔드포인트를 노출하지 않는다.
+    """
+    token = os.getenv("CLEANCUT_ADMIN_TOKEN")
+    if not token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token, token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.post("/admin/profile", dependencies=[Depends(require_admin)])
+async def start_profile(
+    requests: Optional[int] = None,
+    seconds: Optional[float] = None,
+    torch_profile: bool = False,
+    interval_ms: float = 5.0
+):
+    """
+    샘플링 프로파일러 시작 (관리자 전용)
+    
+    다음 requests 개 요청 또는 seconds 초 동안 스택을 샘플링해
+    CLEANCUT_PROFILE_DIR 에 collapsed stack(.folded) 파일을 남긴다.
+    
+    Args:
+        requests: 프로파일링할 요청 수
+        seconds: 프로파일링 시간 (초)
+        torch_profile: 모델 forward 를 torch.profiler 로도 기록 (chrome trace)
+        interval_ms: 샘플링 주기 (밀리초)
+    """
+    if requests is None and seconds is None:
+        seconds = 30.0
+    try:
+        return profile_session.start(
+            requests=requests,
+            seconds=seconds,
+            torch_profile=torch_profile,
+            interval=interval_ms / 1000
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.get("/admin/profile", dependencies=[Depends(require_admin)])
+async def get_profile():
+    """프로파일링 세션 상태와 결과 파일 목록 (관리자 전용)"""
+    return profile_session.status()
+
+@app.delete("/admin/profile", dependencies=[Depends(require_admin)])
+async def stop_profile():
+    """실행 중인 프로파일링 세션 즉시 종료 (관리자 전용)"""
+    profile_session.stop()
+    return profile_session.status()
+
+@app.post("/admin/models", status_code=202, dependencies=[Depends(require_admin)])
+async def swap_model(
+    model: str,
+    tier: Optional[str] = None,
+    input_size: Optional[int] = None
+):
+    """
+    tier 모델 무중단 교체 (관리자 전용)
+    
+    새 모델을 백그라운드에서 로드하고 워밍업한 뒤 tier 를 새 모델로 전환한다.
+    이전 모델은 처리 중인 요청이 모두 끝나면 내린다. 진행 상태는 GET /admin/models.
+    
+    Args:
+        model: Hugging Face 모델 ID 또는 로컬 경로 (@리비전 가능, 예: ZhengPeng7/BiRefNet_HR@main)
+        tier: 교체할 tier (기본값: 기본 tier)
+        input_size: 새 모델 입력 크기 (기본값: 지금 값)
+    """
+    if input_size is not None and input_size <= 0:
+        raise HTTPException(status_code=400, detail="input_size must be positive")
+    try:
+        return tiered_engines.swap(tier or tiered_engines.default_tier, model, input_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.get("/admin/models", dependencies=[Depends(require_admin)])
+async def get_models():
+    """tier 별 모델, 로드된 모델, 교체 진행 상태 (관리자 전용)"""
+    return {
+        "quality_tiers": tiered_engines.describe(),
+        "loaded_models": list(tiered_engines.registry.names),
+        "model_memory_bytes": tiered_engines.registry.loaded_bytes,
+        "swaps": tiered_engines.swaps(),
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
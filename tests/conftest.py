@@ -0,0 +1,6 @@
+"""server_birefnet 을 import 하는 테스트는 가중치 없이 stub 모델로 실행"""
+
+import os
+
+os.environ.setdefault("CLEANCUT_MODEL", "stub")
+os.environ.setdefault("CLEANCUT_STUB_LATENCY_MS", "0")
@@ -0,0 +1,67 @@
+"""python -m cleancut 입력 수집과 manifest 재개"""
+
+import os
+
+import pytest
+
+from cleancut.__main__ import Manifest, collect_inputs
+
+OPTIONS = {"model": "stub", "format": None}
+
+
+def _touch(path, data=b"x"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+
+def test_manifest_resumes_only_finished_unchanged_files(tmp_path):
+    done = _touch(tmp_path / "in" / "a.jpg")
+    failed = _touch(tmp_path / "in" / "b.jpg")
+    output_dir = str(tmp_path / "out")
+    _touch(os.path.join(output_dir, "a.png"))
+
+    manifest = Manifest(os.path.join(output_dir, "manifest.jsonl"), OPTIONS)
+    manifest.record(done, "a.png")
+    manifest.record(failed, None, error="bad batch")
+    manifest.close()
+
+    resumed = Manifest(os.path.join(output_dir, "manifest.jsonl"), OPTIONS)
+    assert resumed.done(done, output_dir)
+    # 실패한 파일은 다시 처리
+    assert not resumed.done(failed, output_dir)
+    # 옵션이 바뀌면 다시 처리
+    assert not Manifest(resumed.path, {**OPTIONS, "format": "svg"}).done(done, output_dir)
+
+    # 출력이 지워지거나 입력이 바뀌면 다시 처리
+    os.remove(os.path.join(output_dir, "a.png"))
+    assert not resumed.done(done, output_dir)
+    _touch(os.path.join(output_dir, "a.png"))
+    _touch(done, b"changed")
+    assert not resumed.done(done, output_dir)
+
+
+def test_manifest_ignores_truncated_last_line(tmp_path):
+    source = _touch(tmp_path / "a.jpg")
+    _touch(tmp_path / "a.png")
+    manifest = Manifest(str(tmp_path / "manifest.jsonl"), OPTIONS)
+    manifest.record(source, "a.png")
+    manifest.close()
+    with open(manifest.path, "a", encoding="utf-8") as f:
+        f.write('{"input": "cut')
+    assert Manifest(manifest.path, OPTIONS).done(source, str(tmp_path))
+
+
+def test_glob_inputs_keep_relative_paths(tmp_path):
+    _touch(tmp_path / "dump" / "a" / "x.jpg")
+    _touch(tmp_path / "dump" / "b" / "x.jpg")
+    items = collect_inputs([str(tmp_path / "dump" / "**" / "*.jpg")])
+    assert [relative for _, relative in items] == [os.path.join("a", "x.jpg"), os.path.join("b", "x.jpg")]
+
+
+def test_colliding_outputs_are_rejected(tmp_path):
+    _touch(tmp_path / "x.jpg")
+    _touch(tmp_path / "x.png")
+    with pytest.raises(ValueError):
+        collect_inputs([str(tmp_path)])
@@ -0,0 +1,59 @@
+"""결과 자르기 (crop=true, X-Crop-Offset)"""
+
+import io
+
+from PIL import Image
+
+from cleancut.compose import alpha_bbox
+
+
+def _rgba(size, box, alpha=255):
+    image = Image.new("RGBA", size, (0, 0, 0, 0))
+    image.paste((255, 0, 0, alpha), box)
+    return image
+
+
+def test_alpha_bbox_adds_margin():
+    assert alpha_bbox(_rgba((40, 30), (10, 5, 20, 15)), margin=3) == (7, 2, 23, 18)
+
+
+def test_alpha_bbox_clamps_to_image():
+    assert alpha_bbox(_rgba((40, 30), (0, 0, 5, 30)), margin=4) == (0, 0, 9, 30)
+
+
+def test_alpha_bbox_ignores_faint_alpha():
+    assert alpha_bbox(_rgba((40, 30), (10, 5, 20, 15), alpha=8), threshold=8) is None
+
+
+def _post(client, **params):
+    payload = io.BytesIO()
+    Image.new("RGB", (160, 120), (90, 120, 200)).save(payload, format="PNG")
+    files = {"file": ("photo.png", payload.getvalue(), "image/png")}
+    return client.post("/remove-background", params=params, files=files)
+
+
+def test_crop_headers_match_subject_box():
+    from fastapi.testclient import TestClient
+
+    import server_birefnet
+
+    client = TestClient(server_birefnet.app)
+    full = _post(client)
+    assert full.status_code == 200
+    assert "X-Crop-Offset" not in full.headers
+    left, top, right, bottom = alpha_bbox(Image.open(io.BytesIO(full.content)), margin=4)
+
+    cropped = _post(client, crop="true", crop_margin=4)
+    assert cropped.status_code == 200
+    assert cropped.headers["X-Crop-Offset"] == f"{left},{top}"
+    assert cropped.headers["X-Original-Size"] == "160x120"
+    assert Image.open(io.BytesIO(cropped.content)).size == (right - left, bottom - top)
+    assert (left, top) != (0, 0)
+
+
+def test_crop_margin_must_not_be_negative():
+    from fastapi.testclient import TestClient
+
+    import server_birefnet
+
+    assert _post(TestClient(server_birefnet.app), crop="true", crop_margin=-1).status_code == 400
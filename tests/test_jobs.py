@@ -0,0 +1,45 @@
+"""cleancut.jobs 이벤트 스트림"""
+
+import asyncio
+import time
+
+from cleancut.jobs import STATUS_SUCCEEDED, Job, JobStore, iter_events
+
+
+def _finished_job() -> Job:
+    job = Job("a.png")
+    job.emit("queued", 0.0)
+    job.emit("decoded", 0.1)
+    job.status = STATUS_SUCCEEDED
+    job.emit(STATUS_SUCCEEDED, 1.0)
+    return job
+
+
+async def _collect(job: Job, start: int):
+    return [index async for index, _ in iter_events(job, start)]
+
+
+def test_resume_from_last_event_id_ends_stream():
+    job = _finished_job()
+    last = len(job.events) - 1
+    # Last-Event-ID 가 종료 이벤트면 start 는 그 다음 인덱스
+    assert asyncio.run(asyncio.wait_for(_collect(job, last + 1), timeout=1)) == []
+
+
+def test_resume_before_terminal_event_sends_rest():
+    job = _finished_job()
+    assert asyncio.run(asyncio.wait_for(_collect(job, 1), timeout=1)) == [1, 2]
+
+
+def test_finished_jobs_are_capped():
+    store = JobStore(ttl_seconds=600, max_finished=2)
+    try:
+        jobs = [store.submit(lambda job: (b"png", "image/png")) for _ in range(4)]
+        deadline = time.time() + 5
+        while not all(job.finished for job in jobs) and time.time() < deadline:
+            time.sleep(0.01)
+        # TTL 전이라도 가장 최근에 끝난 max_finished 개만 남는다
+        assert store.evict_expired() == 2
+        assert [store.get(job.id) is not None for job in jobs] == [False, False, True, True]
+    finally:
+        store.shutdown()
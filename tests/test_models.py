@@ -0,0 +1,102 @@
+"""cleancut.models 레지스트리 LRU 와 사용 수"""
+
+import threading
+
+import pytest
+import torch
+
+from cleancut.models import ModelRegistry
+
+# Linear(16, 16, bias=False) 하나의 크기
+MODEL_BYTES = 16 * 16 * 4
+
+
+def _registry(models: int, loads: list = None) -> ModelRegistry:
+    def loader(name):
+        if name == "broken":
+            raise OSError("no weights")
+        if loads is not None:
+            loads.append(name)
+        return torch.nn.Linear(16, 16, bias=False), torch.device("cpu")
+    return ModelRegistry(max_bytes=models * MODEL_BYTES, loader=loader)
+
+
+def _touch(registry, *names):
+    for name in names:
+        with registry.use(name):
+            pass
+
+
+def test_evicts_least_recently_used():
+    registry = _registry(2)
+    _touch(registry, "a", "b", "a", "c")
+    assert registry.names == ("a", "c")
+    assert registry.loaded_bytes == 2 * MODEL_BYTES
+
+
+def test_reloads_evicted_model():
+    loads = []
+    registry = _registry(1, loads)
+    _touch(registry, "a", "a", "b", "a")
+    assert loads == ["a", "b", "a"]
+
+
+def test_model_in_use_is_not_evicted():
+    registry = _registry(1)
+    with registry.use("a") as a:
+        _touch(registry, "b")
+        # 예산을 넘어도 사용 중인 a 는 남고, 다 쓴 b 가 내려간다
+        assert registry.names == ("a",)
+        assert a.model is not None and a.refs == 1
+    assert a.refs == 0
+
+
+def test_refs_count_nested_uses():
+    registry = _registry(0)
+    with registry.use("a") as first:
+        with registry.use("a") as second:
+            assert second is first and first.refs == 2
+        assert first.refs == 1
+    assert first.refs == 0
+
+
+def test_unload_waits_for_users():
+    registry = _registry(0)
+    acquired, released = threading.Event(), threading.Event()
+
+    def hold():
+        with registry.use("a"):
+            acquired.set()
+            released.wait()
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    acquired.wait()
+    assert registry.unload("a", timeout=0.05) is False
+    assert registry.is_loaded("a")
+    released.set()
+    assert registry.unload("a", timeout=5) is True
+    thread.join()
+    assert registry.names == () and registry.loaded_bytes == 0
+
+
+def test_unload_notifies_listeners():
+    registry = _registry(1)
+    evicted = []
+    registry.evict_listeners.append(evicted.append)
+    _touch(registry, "a", "b")
+    registry.unload("b")
+    assert evicted == ["a", "b"]
+
+
+@pytest.mark.parametrize("retry, expected", [(False, 1), (True, 2)])
+def test_failed_load_is_not_retried(retry, expected):
+    calls = []
+    registry = _registry(0)
+    loader = registry.loader
+    registry.loader = lambda name: calls.append(name) or loader(name)
+    with registry.use("broken") as loaded:
+        assert loaded is None
+    with registry.use("broken", retry=retry) as loaded:
+        assert loaded is None
+    assert len(calls) == expected
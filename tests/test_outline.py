@@ -0,0 +1,67 @@
+"""cleancut.outline 윤곽선 추적"""
+
+import numpy as np
+from PIL import Image
+
+from cleancut.outline import extract_outline, polygon_area, simplify, to_json, to_svg, trace_contours
+
+
+def _mask(shape, *pixels):
+    mask = np.zeros(shape, dtype=bool)
+    for x, y in pixels:
+        mask[y, x] = True
+    return mask
+
+
+def test_square_with_hole():
+    mask = np.zeros((5, 5), dtype=bool)
+    mask[1:4, 1:4] = True
+    mask[2, 2] = False
+    contours = sorted(trace_contours(mask), key=polygon_area, reverse=True)
+    assert [points.tolist() for points in contours] == [
+        [[1, 1], [4, 1], [4, 4], [1, 4]],
+        [[2, 3], [3, 3], [3, 2], [2, 2]],
+    ]
+    # 바깥 윤곽과 구멍은 방향이 반대
+    assert polygon_area(contours[0]) == 9
+    assert polygon_area(contours[1]) == -1
+
+
+def test_diagonal_pixels_are_separate_contours():
+    contours = trace_contours(_mask((4, 4), (0, 0), (1, 1)))
+    assert len(contours) == 2
+    assert all(len(points) == 4 and polygon_area(points) == 1 for points in contours)
+
+
+def test_empty_mask():
+    assert trace_contours(np.zeros((3, 3), dtype=bool)) == []
+
+
+def test_simplify_drops_points_within_tolerance():
+    # 한 변 가운데가 0.5 튀어나온 사각형
+    points = np.array([[0, 0], [5, 0.5], [10, 0], [10, 10], [0, 10]], dtype=float)
+    assert simplify(points, 1.0).tolist() == [[0, 0], [10, 0], [10, 10], [0, 10]]
+    assert len(simplify(points, 0.1)) == 5
+
+
+def test_extract_outline_filters_small_specks():
+    alpha = np.zeros((32, 32), dtype=np.uint8)
+    alpha[4:20, 4:20] = 255
+    alpha[28, 28] = 255
+    image = Image.new("RGBA", (32, 32))
+    image.putalpha(Image.fromarray(alpha))
+    contours = extract_outline(image)
+    assert len(contours) == 1
+    assert polygon_area(contours[0]) == 16 * 16
+
+
+def test_svg_and_json():
+    contours = [np.array([[1, 1], [4, 1], [4, 4], [1, 4]], dtype=float)]
+    svg = to_svg(contours, (8, 6))
+    assert 'viewBox="0 0 8 6"' in svg
+    assert 'd="M1 1 4 1 4 4 1 4Z"' in svg
+    assert to_json(contours, (8, 6)) == {
+        "width": 8,
+        "height": 6,
+        "polygons": [[[1.0, 1.0], [4.0, 1.0], [4.0, 4.0], [1.0, 4.0]]],
+    }
@@ -0,0 +1,14 @@
+"""cleancut.tiers 워밍업"""
+
+from cleancut.engine import Engine, EngineConfig
+from cleancut.metrics import BATCH_SIZE, STAGE_SECONDS
+from cleancut.models import load_model
+from cleancut.tiers import warm_up
+
+
+def test_warm_up_keeps_metrics_clean():
+    engine = Engine(EngineConfig(model_name="stub", input_size=64))
+    engine.model, engine.device = load_model("stub")
+    before = (STAGE_SECONDS.samples(), BATCH_SIZE.samples())
+    warm_up(engine)
+    assert (STAGE_SECONDS.samples(), BATCH_SIZE.samples()) == before
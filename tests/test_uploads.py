@@ -0,0 +1,97 @@
+"""cleancut.uploads 형식 판별과 413/415"""
+
+import asyncio
+import io
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from PIL import Image
+
+from cleancut.uploads import UploadLimitMiddleware, open_upload, sniff_format
+
+
+def _encoded(image_format: str) -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", (8, 8), (200, 30, 30)).save(output, format=image_format)
+    return output.getvalue()
+
+
+@pytest.mark.parametrize("image_format", ["JPEG", "PNG", "WEBP", "GIF", "BMP", "TIFF"])
+def test_sniff_format(image_format):
+    assert sniff_format(_encoded(image_format)[:16]) == image_format
+
+
+def test_sniff_format_unknown():
+    assert sniff_format(b"%PDF-1.7\n") is None
+    assert sniff_format(b"") is None
+
+
+def test_open_upload_rewinds_and_reports_size():
+    data = _encoded("PNG")
+    fp, image_format, size = open_upload(UploadFile(io.BytesIO(data)))
+    assert (image_format, size, fp.tell()) == ("PNG", len(data), 0)
+
+
+def test_open_upload_rejects_large_file():
+    with pytest.raises(HTTPException) as error:
+        open_upload(UploadFile(io.BytesIO(_encoded("PNG"))), max_bytes=16)
+    assert error.value.status_code == 413
+
+
+def test_open_upload_rejects_unsupported_format():
+    # 확장자/Content-Type 이 아니라 내용으로 판별
+    upload = UploadFile(io.BytesIO(_encoded("GIF")), filename="photo.png")
+    with pytest.raises(HTTPException) as error:
+        open_upload(upload, formats=("JPEG", "PNG"))
+    assert error.value.status_code == 415
+
+
+def _call(app, headers, chunks):
+    """ASGI 앱에 POST 를 보내고 (상태 코드, 응답 헤더)"""
+    scope = {"type": "http", "method": "POST", "path": "/", "headers": headers}
+    messages = [{"type": "http.request", "body": chunk, "more_body": True} for chunk in chunks]
+    messages.append({"type": "http.request", "body": b"", "more_body": False})
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return sent[0]["status"], dict(sent[0]["headers"])
+
+
+async def _read_body(scope, receive, send):
+    while (await receive()).get("more_body"):
+        pass
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def test_middleware_rejects_declared_length():
+    app = UploadLimitMiddleware(_read_body, max_bytes=10)
+    status, _ = _call(app, [(b"content-length", b"11")], [b"x" * 11])
+    assert status == 413
+
+
+def test_middleware_rejects_streamed_body():
+    app = UploadLimitMiddleware(_read_body, max_bytes=10)
+    status, _ = _call(app, [], [b"x" * 6, b"x" * 6])
+    assert status == 413
+    status, _ = _call(app, [], [b"x" * 5, b"x" * 5])
+    assert status == 200
+
+
+def test_server_413_has_cors_headers():
+    import server_birefnet
+
+    headers = [
+        (b"origin", b"https://editor.example"),
+        (b"content-type", b"multipart/form-data; boundary=x"),
+        (b"content-length", str(2**40).encode()),
+    ]
+    status, response_headers = _call(server_birefnet.app, headers, [])
+    assert status == 413
+    assert b"access-control-allow-origin" in response_headers